@@ -0,0 +1,242 @@
+import os
+import sys
+import json
+import time
+import argparse
+import importlib
+import subprocess
+from collections import namedtuple
+
+# Times every engine of the Python solutions in-process, on the real inputs
+# and on scaled synthetic ones from each day's generate_input.py. Each case
+# runs in its own interpreter, so peak RSS and caches are per case.
+#
+#   python3 benchmark.py --days day9,day11 --scale 2 --save baseline.json
+#   python3 benchmark.py --baseline baseline.json   # exits 1 on regressions
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# module: file in the day's directory with a run(filename, **kwargs) function
+# kwargs: passed to run() to select the engine
+# synthetic: False when the engine is too slow for the generated inputs
+Case = namedtuple('Case', 'day engine module kwargs synthetic')
+
+DAY12_BUDGET = {'max_nodes': 5000, 'time_limit': None, 'symmetry': True, 'prune_dead': True}
+
+CASES = [
+    Case('day6', 'parse', 'solution', {}, True),
+    Case('day6', 'stream', 'solution', {'stream': True}, True),
+    Case('day6', 'mod', 'solution', {'modulus': 1000000007}, True),
+    Case('day9', 'loop', 'solution', {'engine': 'loop'}, False),
+    Case('day9', 'grid', 'solution', {'engine': 'grid'}, True),
+    Case('day9', 'edges', 'solution', {'engine': 'edges'}, True),
+    Case('day9', 'stream', 'solution', {'engine': 'stream'}, True),
+    Case('day9', 'numpy', 'solution', {'engine': 'numpy'}, True),
+    Case('day11', 'memo', 'solution', {'engine': 'memo', 'loader': 'dict'}, True),
+    Case('day11', 'topo', 'solution', {'engine': 'topo'}, True),
+    Case('day11', 'mod', 'solution', {'mod': 1000000007}, True),
+    Case('day11', 'crt', 'solution', {'crt': 8}, True), # the generated counts need ~160 bits
+    Case('day12', 'set', 'solve', {'engine': 'set', 'options': DAY12_BUDGET}, True),
+    Case('day12', 'bitboard', 'solve', {'engine': 'bitboard', 'options': DAY12_BUDGET}, True),
+    Case('day12', 'iterative', 'solve', {'engine': 'iterative', 'options': DAY12_BUDGET}, True),
+    Case('day12', 'dlx', 'solve', {'engine': 'dlx', 'options': DAY12_BUDGET}, True),
+]
+
+# generate_input.py arguments for each day at --scale 1
+GENERATORS = {
+    'day6': lambda scale: ['--problems', str(int(100000 * scale))],
+    'day9': lambda scale: ['--size', str(int(5000 * scale))],
+    'day11': lambda scale: ['--layers', '100', '--width', str(int(2000 * scale))],
+    'day12': lambda scale: ['--regions', str(int(300 * scale)), '--max-size', '14', '--min-fill', '0.6'],
+}
+
+def summarize(day, result):
+    # A JSON-friendly result that a baseline can be compared against
+    if day == 'day12':
+        solved = sum(1 for outcome, _, _ in result if outcome is True)
+        unknown = sum(1 for outcome, _, _ in result if outcome is None)
+        return {'solved': solved, 'unknown': unknown, 'nodes': sum(nodes for _, _, nodes in result)}
+    return json.loads(json.dumps(result))
+
+def peak_rss_mb():
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def hot_spots(profile, limit):
+    # The `limit` functions with the most time spent in their own code
+    import pstats
+    stats = pstats.Stats(profile).stats
+    rows = sorted(stats.items(), key=lambda item: item[1][2], reverse=True)[:limit]
+    spots = []
+    for (filename, line, name), (_, calls, own, cumulative, _) in rows:
+        where = f"{os.path.relpath(filename, ROOT)}:{line}" if filename.startswith(ROOT) else filename
+        spots.append({'function': f"{where}({name})", 'calls': calls,
+                      'tottime': round(own, 4), 'cumtime': round(cumulative, 4)})
+    return spots
+
+def run_case(case, filename, profile=0):
+    # Runs one case in this process and returns its measurements
+    if hasattr(sys, 'set_int_max_str_digits'):
+        sys.set_int_max_str_digits(0)
+    sys.path.insert(0, os.path.join(ROOT, case.day))
+    run = importlib.import_module(case.module).run
+    base_mb = peak_rss_mb()
+    record = {}
+    if profile:
+        import cProfile
+        profiler = cProfile.Profile()
+        start = time.perf_counter()
+        result = profiler.runcall(run, filename, **case.kwargs)
+        record['wall'] = time.perf_counter() - start
+        record['hot_spots'] = hot_spots(profiler, profile)
+    else:
+        start = time.perf_counter()
+        result = run(filename, **case.kwargs)
+        record['wall'] = time.perf_counter() - start
+    record['peak_mb'] = peak_rss_mb()
+    record['base_mb'] = base_mb
+    record['result'] = summarize(case.day, result)
+    return record
+
+def worker(spec):
+    case = next(c for c in CASES if (c.day, c.engine) == (spec['day'], spec['engine']))
+    record = run_case(case, spec['input'], spec['profile'])
+    with open(spec['output'], 'w') as f:
+        json.dump(record, f)
+
+def synthetic_input(day, scale, work_dir):
+    # Generates (once) and returns the synthetic input for a day
+    args = GENERATORS[day](scale)
+    path = os.path.join(work_dir, f"{day}-{'-'.join(a.lstrip('-') for a in args)}.txt")
+    if not os.path.exists(path):
+        os.makedirs(work_dir, exist_ok=True)
+        with open(path + '.tmp', 'w') as out:
+            subprocess.run([sys.executable, os.path.join(ROOT, day, 'generate_input.py'), *args],
+                           stdout=out, check=True)
+        os.replace(path + '.tmp', path)
+    return path
+
+def run_worker(case, filename, profile, args):
+    output = os.path.join(args.work_dir, 'worker.json')
+    spec = {'day': case.day, 'engine': case.engine, 'input': filename,
+            'profile': profile, 'output': output}
+    try:
+        subprocess.run([sys.executable, os.path.abspath(__file__), '--worker', json.dumps(spec)],
+                       check=True, timeout=args.timeout)
+    except subprocess.TimeoutExpired:
+        return {'error': f"timed out after {args.timeout}s"}
+    except subprocess.CalledProcessError as e:
+        return {'error': f"exited with code {e.returncode}"}
+    with open(output) as f:
+        return json.load(f)
+
+def measure(case, filename, args):
+    # Best wall time and highest peak RSS over --repeat fresh interpreters.
+    # Hot spots come from one extra run, so profiling never skews the timings.
+    best = None
+    for _ in range(args.repeat):
+        record = run_worker(case, filename, 0, args)
+        if 'error' in record:
+            return record
+        if best is None:
+            best = record
+        else:
+            best['wall'] = min(best['wall'], record['wall'])
+            best['peak_mb'] = max(best['peak_mb'], record['peak_mb'])
+    if args.profile:
+        best['hot_spots'] = run_worker(case, filename, args.profile, args).get('hot_spots', [])
+    return best
+
+def compare(record, baseline, tolerance, min_delta):
+    # Reasons this record regressed against its baseline entry
+    problems = []
+    if 'error' in record:
+        return [record['error']]
+    if baseline is None or 'error' in baseline:
+        return problems
+    if record['result'] != baseline['result']:
+        problems.append("result changed")
+    if record['wall'] > baseline['wall'] * (1 + tolerance) and record['wall'] - baseline['wall'] > min_delta:
+        problems.append(f"wall {baseline['wall']:.3f}s -> {record['wall']:.3f}s")
+    if record['peak_mb'] > baseline['peak_mb'] * (1 + tolerance) and record['peak_mb'] - baseline['peak_mb'] > 5:
+        problems.append(f"peak {baseline['peak_mb']:.1f} MB -> {record['peak_mb']:.1f} MB")
+    return problems
+
+def short(result, width=40):
+    text = json.dumps(result)
+    return text if len(text) <= width else text[:width - 3] + '...'
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Python solutions")
+    parser.add_argument('--days', help="comma-separated days to run (default: all)")
+    parser.add_argument('--engines', help="comma-separated engines to run (default: all)")
+    parser.add_argument('--input', choices=['real', 'synthetic', 'both'], default='both',
+                        help="which inputs to time (default: both)")
+    parser.add_argument('--scale', type=float, default=1.0,
+                        help="size multiplier for the synthetic inputs (default: 1)")
+    parser.add_argument('--repeat', type=int, default=1,
+                        help="runs per case; the best wall time is kept (default: 1)")
+    parser.add_argument('--profile', type=int, default=0, metavar='N',
+                        help="profile one more run with cProfile and show the top N functions")
+    parser.add_argument('--timeout', type=float, default=600,
+                        help="seconds before a case is abandoned (default: 600)")
+    parser.add_argument('--work-dir', default=os.path.join(ROOT, '.bench'),
+                        help="where generated inputs are kept (default: .bench)")
+    parser.add_argument('--save', metavar='FILE', help="write the results as a JSON baseline")
+    parser.add_argument('--baseline', metavar='FILE', help="compare against a saved baseline")
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="allowed relative slowdown or memory growth (default: 0.25)")
+    parser.add_argument('--min-delta', type=float, default=0.05,
+                        help="ignore slowdowns smaller than this many seconds (default: 0.05)")
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(json.loads(args.worker))
+        return
+
+    days = set(args.days.split(',')) if args.days else None
+    engines = set(args.engines.split(',')) if args.engines else None
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['cases']
+    os.makedirs(args.work_dir, exist_ok=True)
+
+    records = {}
+    regressions = 0
+    print(f"{'case':32} {'wall':>9} {'peak':>9}  result")
+    for case in CASES:
+        if days and case.day not in days or engines and case.engine not in engines:
+            continue
+        inputs = []
+        if args.input in ('real', 'both'):
+            inputs.append(('real', os.path.join(ROOT, case.day, 'input.txt')))
+        if args.input in ('synthetic', 'both') and case.synthetic:
+            inputs.append((f"x{args.scale:g}", synthetic_input(case.day, args.scale, args.work_dir)))
+        for label, filename in inputs:
+            key = f"{case.day}/{case.engine}/{label}"
+            record = measure(case, filename, args)
+            records[key] = record
+            problems = compare(record, baseline.get(key), args.tolerance, args.min_delta)
+            if 'error' in record:
+                print(f"{key:32} {'':>9} {'':>9}  {record['error']}")
+            else:
+                print(f"{key:32} {record['wall']:8.3f}s {record['peak_mb']:6.1f} MB  {short(record['result'])}")
+            for problem in problems:
+                print(f"    REGRESSION: {problem}")
+            regressions += bool(problems)
+            for spot in record.get('hot_spots', []):
+                print(f"    {spot['tottime']:8.3f}s {spot['cumtime']:8.3f}s {spot['calls']:>9}  {spot['function']}")
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({'python': sys.version.split()[0], 'scale': args.scale, 'cases': records}, f, indent=1)
+    if regressions:
+        print(f"{regressions} regressions against {args.baseline}")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
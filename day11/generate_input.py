@@ -0,0 +1,60 @@
+import sys
+import random
+import argparse
+
+# Writes a random layered DAG in the puzzle's `name: dest dest ...` format,
+# for timing the solution on networks much larger than input.txt.
+# 'svr' and 'you' sit in the first layers, 'fft' and 'dac' in the middle,
+# and every node in the last layer feeds 'out'.
+
+def node_name(index):
+    # Lowercase names of at least three letters, skipping the special ones
+    letters = []
+    index += 26 * 26
+    while index:
+        index, rem = divmod(index, 26)
+        letters.append(chr(ord('a') + rem))
+    return ''.join(reversed(letters))
+
+def generate(layers, width, degree, seed, out):
+    rng = random.Random(seed)
+    special = {'svr', 'you', 'fft', 'dac', 'out'}
+    names = []
+    index = 0
+    for _ in range(layers):
+        layer = []
+        while len(layer) < width:
+            name = node_name(index)
+            index += 1
+            if name not in special:
+                layer.append(name)
+        names.append(layer)
+
+    names[0][0] = 'svr'
+    names[min(1, layers - 1)][-1] = 'you'
+    names[layers // 3][width // 2] = 'fft'
+    names[(2 * layers) // 3][width // 3] = 'dac'
+
+    for depth, layer in enumerate(names):
+        for position, name in enumerate(layer):
+            if depth + 1 < layers:
+                # The node at the same position keeps every node reachable
+                below = names[depth + 1]
+                dests = [below[position]]
+                others = below[:position] + below[position + 1:]
+                dests += rng.sample(others, min(degree, width) - 1)
+            else:
+                dests = ['out']
+            out.write(f"{name}: {' '.join(dests)}\n")
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a large Day 11 input")
+    parser.add_argument('--layers', type=int, default=100)
+    parser.add_argument('--width', type=int, default=1000)
+    parser.add_argument('--degree', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+    generate(args.layers, args.width, args.degree, args.seed, sys.stdout)
+
+if __name__ == '__main__':
+    main()
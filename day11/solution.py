@@ -1,4 +1,17 @@
+import os
 import sys
+import math
+import stat
+import time
+import argparse
+import itertools
+from array import array
+from collections import deque
+
+try:
+    import numpy as np
+except ImportError: # only needed for --mod / --crt
+    np = None
 
 def count_paths(start_node, target_node, graph, memo):
     if start_node == target_node:
@@ -18,55 +31,480 @@ def count_paths(start_node, target_node, graph, memo):
     memo[memo_key] = total_paths
     return total_paths
 
+class GraphCycleError(ValueError):
+    pass
+
+class CountOverflowError(ValueError):
+    pass
+
+class CSRGraph:
+    # Compressed sparse row graph: node names are interned to ids, and the
+    # destinations of node v are targets[offsets[v]:offsets[v + 1]], both
+    # stored as array('I'). Also supports `name in graph` and graph[name]
+    # like the dict-of-lists form, so count_paths runs on it unchanged.
+    def __init__(self):
+        self.ids = {}
+        self.names = []
+        self.offsets = array('I', [0])
+        self.targets = array('I')
+
+    @classmethod
+    def from_lines(cls, lines):
+        # Streams `name: dest dest ...` lines. Edges are first appended in
+        # line order, then compacted into id order once all nodes are known.
+        graph = cls()
+        ids = graph.ids
+        intern = ids.setdefault # new names get the next id
+        line_source = array('I')
+        line_start = array('I')
+        line_targets = array('I')
+        for line in lines:
+            source, sep, rest = line.partition(':')
+            if not sep:
+                continue
+            line_source.append(intern(source.strip(), len(ids)))
+            line_start.append(len(line_targets))
+            line_targets.extend([intern(dest, len(ids)) for dest in rest.split()])
+        line_start.append(len(line_targets))
+        graph.names = list(ids) # dicts keep insertion order, i.e. id order
+
+        # A later line for the same source replaces an earlier one
+        row = array('i', [-1]) * len(graph.names)
+        for i, source in enumerate(line_source):
+            row[source] = i
+        offsets, targets = graph.offsets, graph.targets
+        for i in row:
+            if i >= 0:
+                targets.extend(line_targets[line_start[i]:line_start[i + 1]])
+            offsets.append(len(targets))
+        return graph
+
+    @classmethod
+    def from_file(cls, filename):
+        with open(filename, 'r') as f:
+            return cls.from_lines(f)
+
+    @classmethod
+    def from_dict(cls, graph):
+        return cls.from_lines(f"{source}: {' '.join(dests)}" for source, dests in graph.items())
+
+    def __len__(self):
+        return len(self.names)
+
+    def neighbours(self, node):
+        return self.targets[self.offsets[node]:self.offsets[node + 1]]
+
+    def __contains__(self, name):
+        return name in self.ids
+
+    def __getitem__(self, name):
+        return [self.names[t] for t in self.neighbours(self.ids[name])]
+
+class TopoPathCounter:
+    # Node names are interned to integer ids and the graph is sorted once
+    # with Kahn's algorithm. Counts come from per-target vectors of path
+    # counts from every node, built by one reverse pass over the
+    # topological order (no recursion) and kept for later queries.
+    # Runs on a CSRGraph; a dict-of-lists graph is converted first.
+    def __init__(self, graph):
+        if not isinstance(graph, CSRGraph):
+            graph = CSRGraph.from_dict(graph)
+        self.graph = graph
+        self.ids = graph.ids
+        self.names = graph.names
+        offsets, targets = graph.offsets, graph.targets
+
+        n = len(self.names)
+        indegree = array('I', [0]) * n
+        for t in targets:
+            indegree[t] += 1
+        queue = deque(v for v in range(n) if indegree[v] == 0)
+        self.order = array('I')
+        while queue:
+            v = queue.popleft()
+            self.order.append(v)
+            for t in targets[offsets[v]:offsets[v + 1]]:
+                indegree[t] -= 1
+                if indegree[t] == 0:
+                    queue.append(t)
+        if len(self.order) < n:
+            stuck = sorted(self.names[v] for v in range(n) if indegree[v] > 0)
+            raise GraphCycleError(f"graph has a cycle; nodes on or after it: {' '.join(stuck[:10])}"
+                                  + (" ..." if len(stuck) > 10 else ""))
+        self.position = array('I', [0]) * n
+        for pos, v in enumerate(self.order):
+            self.position[v] = pos
+        self._paths_to = {} # target name -> path counts from every node id
+
+    def paths_to(self, targets):
+        # {target: list of path counts from every node id to target}, for
+        # all targets at once in one reverse-topological sweep. Results are
+        # cached, so later queries on the same targets are lookups.
+        missing = [t for t in dict.fromkeys(targets) if t in self.ids and t not in self._paths_to]
+        if missing:
+            n = len(self.names)
+            offsets, edges = self.graph.offsets, self.graph.targets
+            vectors = [[0] * n for _ in missing]
+            target_ids = [self.ids[t] for t in missing]
+            for v in reversed(self.order):
+                targets_v = edges[offsets[v]:offsets[v + 1]]
+                for ways, target in zip(vectors, target_ids):
+                    if v == target:
+                        ways[v] = 1
+                    else:
+                        total = 0
+                        for t in targets_v:
+                            total += ways[t]
+                        ways[v] = total
+            self._paths_to.update(zip(missing, vectors))
+        return {t: self._paths_to[t] for t in targets if t in self._paths_to}
+
+    def count(self, start_node, target_node):
+        if start_node == target_node:
+            return 1
+        if start_node not in self.ids or target_node not in self.ids:
+            return 0
+        return self.paths_to([target_node])[target_node][self.ids[start_node]]
+
+    def count_via(self, start_node, target_node, waypoints):
+        # Paths from start to target visiting every waypoint. In a DAG a path
+        # meets its nodes in topological order, so only that one ordering of
+        # the waypoints can contribute and the count is a product of segments.
+        nodes = [start_node] + list(waypoints) + [target_node]
+        if len(set(nodes)) == 1:
+            return 1 # only start -> start segments, known node or not, as in count()
+        if any(node not in self.ids for node in nodes):
+            return 0
+        stops = sorted(set(waypoints), key=lambda node: self.position[self.ids[node]])
+        route = [start_node] + stops + [target_node]
+        vectors = self.paths_to(route[1:])
+        total = 1
+        for source, dest in zip(route, route[1:]):
+            total *= 1 if source == dest else vectors[dest][self.ids[source]]
+            if not total:
+                break
+        return total
+
+# Primes below 2**31: residues and their sums over any out-degree fit in int64
+CRT_PRIMES = (2147483647, 2147483629, 2147483587, 2147483579,
+              2147483563, 2147483549, 2147483543, 2147483497)
+
+def crt_combine(residues, moduli):
+    # The unique value below prod(moduli) with the given residues
+    total, product = 0, 1
+    for residue, modulus in zip(residues, moduli):
+        step = (residue - total) * pow(product, -1, modulus) % modulus
+        total += product * step
+        product *= modulus
+    return total
+
+def _edge_ranges(offsets, nodes):
+    # Edge indices of all the given nodes' out-edges, concatenated
+    starts = offsets[nodes]
+    lengths = offsets[nodes + 1] - starts
+    base = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+    return base + np.arange(base.size), lengths
+
+class ModularPathCounter:
+    # Path counts modulo each of `moduli`, on fixed-width int64 NumPy vectors
+    # instead of big ints. Nodes are peeled into levels by longest path to a
+    # sink, so every edge points to a lower level and a whole level is
+    # counted with one gather and one reduceat. One modulus gives counts mod
+    # P; several coprime moduli give the exact count by CRT, as long as it is
+    # below their product. With exact=True a float64 estimate of every count
+    # is swept alongside the residues, and a count that may not fit raises
+    # CountOverflowError instead of coming back wrapped around.
+    def __init__(self, graph, moduli, exact=False):
+        if np is None:
+            raise ImportError("modular path counting needs NumPy")
+        if not isinstance(graph, CSRGraph):
+            graph = CSRGraph.from_dict(graph)
+        self.graph = graph
+        self.ids = graph.ids
+        self.names = graph.names
+        self.moduli = tuple(moduli)
+        self._moduli = np.array(self.moduli, dtype=np.int64)
+        self.exact = exact
+
+        n = len(self.names)
+        offsets = np.asarray(graph.offsets, dtype=np.int64)
+        targets = np.asarray(graph.targets, dtype=np.int64)
+        outdegree = np.diff(offsets)
+        max_degree = int(outdegree.max(initial=1))
+        if min(self.moduli) < 2 or max(self.moduli) * max(max_degree, 1) >= 1 << 63:
+            raise ValueError(f"moduli must be at least 2 and below {(1 << 63) // max(max_degree, 1)}"
+                             f" for this graph")
+
+        # Reverse CSR: predecessors of each node
+        by_target = np.argsort(targets, kind='stable')
+        predecessors = np.repeat(np.arange(n, dtype=np.int64), outdegree)[by_target]
+        pred_offsets = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(targets, minlength=n), out=pred_offsets[1:])
+
+        # Kahn's algorithm on the reversed graph, one whole frontier at a time
+        remaining = outdegree.copy()
+        self.height = np.zeros(n, dtype=np.int64)
+        self.levels = [] # (nodes, destinations of their edges, segment starts)
+        frontier = np.flatnonzero(remaining == 0)
+        peeled = 0
+        while frontier.size:
+            self.height[frontier] = len(self.levels)
+            edges, lengths = _edge_ranges(offsets, frontier)
+            starts = np.cumsum(lengths) - lengths
+            self.levels.append((frontier, targets[edges], starts))
+            peeled += frontier.size
+            preds, _ = _edge_ranges(pred_offsets, frontier)
+            preds = predecessors[preds]
+            np.subtract.at(remaining, preds, 1)
+            preds = np.unique(preds)
+            frontier = preds[remaining[preds] == 0]
+        if peeled < n:
+            stuck = sorted(self.names[v] for v in np.flatnonzero(remaining > 0)[:10])
+            raise GraphCycleError(f"graph has a cycle; nodes on or before it: {' '.join(stuck)}"
+                                  + (" ..." if n - peeled > 10 else ""))
+        self._paths_to = {} # target name -> (n, len(moduli)) residues
+        self._magnitudes = {} # target name -> float64 estimate of every count
+
+    def paths_to(self, targets):
+        # {target: residues of the path counts from every node id to target}.
+        # Only levels above the target's can reach it, so the sweep starts there.
+        for target in dict.fromkeys(targets):
+            if target in self.ids and target not in self._paths_to:
+                t = self.ids[target]
+                ways = np.zeros((len(self.names), len(self.moduli)), dtype=np.int64)
+                ways[t] = 1
+                # Rounding only loses a few ulps per level; inf past 2**1024
+                magnitude = np.zeros(len(self.names)) if self.exact else None
+                if magnitude is not None:
+                    magnitude[t] = 1
+                for nodes, dests, starts in self.levels[self.height[t] + 1:]:
+                    sums = np.add.reduceat(ways[dests], starts, axis=0)
+                    sums %= self._moduli
+                    ways[nodes] = sums
+                    if magnitude is not None:
+                        magnitude[nodes] = np.add.reduceat(magnitude[dests], starts)
+                self._paths_to[target] = ways
+                self._magnitudes[target] = magnitude
+        return {t: self._paths_to[t] for t in targets if t in self._paths_to}
+
+    def _residues(self, route):
+        # Residues of the product of the segment counts along route, and
+        # (with exact=True) an estimate of that product
+        vectors = self.paths_to(route[1:])
+        residues = [1] * len(self.moduli)
+        estimate = 1.0
+        for source, dest in zip(route, route[1:]):
+            if source != dest:
+                segment = vectors[dest][self.ids[source]]
+                residues = [r * int(s) % m for r, s, m in zip(residues, segment, self.moduli)]
+                if self.exact:
+                    estimate *= self._magnitudes[dest][self.ids[source]]
+        if self.exact:
+            self._check_fits(estimate)
+        return residues
+
+    def _check_fits(self, estimate):
+        # The CRT value is only the count if the count is below prod(moduli).
+        # The margin covers the estimate's rounding error.
+        limit = math.prod(self.moduli)
+        if estimate * (1 + 1e-6) >= limit:
+            size = f"2**{math.log2(estimate):.1f}" if math.isfinite(estimate) else "over 2**1024"
+            hint = ("use more --crt primes" if len(self.moduli) < len(CRT_PRIMES)
+                    else "use the exact engines")
+            raise CountOverflowError(f"path count is about {size}, too large for "
+                                     f"{len(self.moduli)} CRT prime{'s' if len(self.moduli) > 1 else ''} (below 2**{math.log2(limit):.1f});"
+                                     f" {hint}")
+
+    def _combine(self, residues):
+        if len(self.moduli) == 1:
+            return residues[0]
+        return crt_combine(residues, self.moduli)
+
+    def count(self, start_node, target_node):
+        if start_node == target_node:
+            return 1
+        if start_node not in self.ids or target_node not in self.ids:
+            return 0
+        return self._combine(self._residues([start_node, target_node]))
+
+    def count_via(self, start_node, target_node, waypoints):
+        # As TopoPathCounter.count_via: a path's nodes have strictly falling
+        # heights, so the waypoints can only be met in order of height. Ties
+        # cannot reach each other, which the zero segment count takes care of.
+        nodes = [start_node] + list(waypoints) + [target_node]
+        if len(set(nodes)) == 1:
+            return 1 # only start -> start segments, known node or not, as in count()
+        if any(node not in self.ids for node in nodes):
+            return 0
+        stops = sorted(set(waypoints), key=lambda node: -self.height[self.ids[node]])
+        return self._combine(self._residues([start_node] + stops + [target_node]))
+
+class MemoPathCounter:
+    # The original recursive count, with one memo shared across calls
+    def __init__(self, graph):
+        self.graph = graph
+        self.memo = {}
+
+    def count(self, start_node, target_node):
+        return count_paths(start_node, target_node, self.graph, self.memo)
+
+    def count_via(self, start_node, target_node, waypoints):
+        # Sum over every visiting order of the product of segment counts
+        total = 0
+        for order in itertools.permutations(dict.fromkeys(waypoints)):
+            route = [start_node, *order, target_node]
+            product = 1
+            for source, dest in zip(route, route[1:]):
+                product *= self.count(source, dest)
+            total += product
+        return total
+
+ENGINES = {
+    'memo': MemoPathCounter,
+    'topo': TopoPathCounter,
+}
+
+def load_graph(filename):
+    # Dict of source name -> list of destination names
+    graph = {}
+    with open(filename, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            parts = line.split(':')
+            source = parts[0].strip()
+            destinations = parts[1].strip().split()
+            graph[source] = destinations
+    return graph
+
+LOADERS = {
+    'dict': load_graph,
+    'csr': CSRGraph.from_file,
+}
+
+def peak_rss_mb():
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def build_counter(graph, engine='topo', mod=None, crt=None):
+    if mod is not None:
+        return ModularPathCounter(graph, [mod])
+    if crt is not None:
+        return ModularPathCounter(graph, CRT_PRIMES[:crt], exact=True)
+    return ENGINES[engine](graph)
+
+def run(filename, engine='topo', loader='csr', mod=None, crt=None):
+    # (part 1, part 2) path counts for a device list file
+    counter = build_counter(LOADERS[loader](filename), engine, mod, crt)
+    return counter.count('you', 'out'), counter.count_via('svr', 'out', ['dac', 'fft'])
+
+def answer_query(counter, line):
+    # `from,to[,via...]` -> path count, as a line of text
+    fields = [field.strip() for field in line.split(',')]
+    if len(fields) < 2 or not all(fields):
+        return "error: expected from,to[,via...]"
+    start_node, target_node, waypoints = fields[0], fields[1], fields[2:]
+    try:
+        if waypoints:
+            return str(counter.count_via(start_node, target_node, waypoints))
+        return str(counter.count(start_node, target_node))
+    except CountOverflowError as e:
+        return f"error: {e}"
+
+def serve_stream(counter, infile, outfile):
+    # One answer line per query line; blank lines are ignored
+    for line in infile:
+        if line.strip():
+            outfile.write(answer_query(counter, line) + "\n")
+            outfile.flush()
+
+def serve_socket(counter, path):
+    # Answers queries on a Unix domain socket, one connection at a time,
+    # with the same counter (and its cached counts) for every client
+    import socketserver
+
+    class QueryHandler(socketserver.StreamRequestHandler):
+        def handle(self):
+            for raw in self.rfile:
+                line = raw.decode().strip()
+                if line:
+                    self.wfile.write((answer_query(counter, line) + "\n").encode())
+
+    if os.path.exists(path):
+        # Only a stale socket from a previous run is ours to remove
+        if not stat.S_ISSOCK(os.stat(path).st_mode):
+            raise FileExistsError(f"'{path}' exists and is not a socket")
+        os.unlink(path)
+    with socketserver.UnixStreamServer(path, QueryHandler) as server:
+        print(f"Serving path count queries on {path}", file=sys.stderr)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            os.unlink(path)
+
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: python solution.py <input_file>")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(description="Day 11: Reactor")
+    parser.add_argument('filename')
+    parser.add_argument('--engine', choices=sorted(ENGINES), default='topo',
+                        help="path counting engine (default: topo)")
+    parser.add_argument('--loader', choices=sorted(LOADERS), default='csr',
+                        help="graph representation (default: csr)")
+    parser.add_argument('--stats', action='store_true',
+                        help="print load time and peak memory")
+    parser.add_argument('--serve', action='store_true',
+                        help="answer from,to[,via...] queries read from stdin")
+    parser.add_argument('--socket', metavar='PATH',
+                        help="answer from,to[,via...] queries on a Unix socket")
+    modes = parser.add_mutually_exclusive_group()
+    modes.add_argument('--mod', type=int, metavar='P',
+                       help="count paths modulo P with NumPy int64 vectors")
+    modes.add_argument('--crt', type=int, metavar='K', choices=range(1, len(CRT_PRIMES) + 1),
+                       help="count paths modulo K 31-bit primes and rebuild the exact "
+                            "count by CRT (exact below about 2**(31*K))")
+    args = parser.parse_args()
         
-    filename = sys.argv[1]
-    graph = {}
+    filename = args.filename
+    serving = args.serve or args.socket
     
     try:
-        with open(filename, 'r') as f:
-            for line in f:
-                line = line.strip()
-                if not line:
-                    continue
-                parts = line.split(':')
-                source = parts[0].strip()
-                destinations = parts[1].strip().split()
-                graph[source] = destinations
+        load_start = time.perf_counter()
+        graph = LOADERS[args.loader](filename)
+        counter = build_counter(graph, args.engine, args.mod, args.crt)
+        suffix = f" (mod {args.mod})" if args.mod is not None else ""
+        if args.stats:
+            print(f"Loaded {filename} with the {args.loader} loader in "
+                  f"{time.perf_counter() - load_start:.3f}s, peak RSS {peak_rss_mb():.1f} MB",
+                  file=sys.stderr if serving else sys.stdout)
+
+        if args.socket:
+            serve_socket(counter, args.socket)
+            return
+        if args.serve:
+            serve_stream(counter, sys.stdin, sys.stdout)
+            return
                 
         # Part 1: 'you' -> 'out'
-        memo = {}
-        result_part1 = count_paths('you', 'out', graph, memo)
-        print(f"Part 1 - Total paths from 'you' to 'out': {result_part1}")
+        result_part1 = counter.count('you', 'out')
+        print(f"Part 1 - Total paths from 'you' to 'out': {result_part1}{suffix}")
         
         # Part 2: 'svr' -> 'out' passing through 'dac' and 'fft'
         # The paths must be either svr -> dac -> fft -> out OR svr -> fft -> dac -> out
         # Since data flows in one direction, one of these orders will be possible, or neither, but not both in a loop (assuming DAG).
-        # We calculate both combinations just in case.
-        
-        memo = {}
-        
-        # Path 1: svr -> dac -> fft -> out
-        p1_seg1 = count_paths('svr', 'dac', graph, memo)
-        p1_seg2 = count_paths('dac', 'fft', graph, memo)
-        p1_seg3 = count_paths('fft', 'out', graph, memo)
-        path1_total = p1_seg1 * p1_seg2 * p1_seg3
-        
-        # Path 2: svr -> fft -> dac -> out
-        p2_seg1 = count_paths('svr', 'fft', graph, memo)
-        p2_seg2 = count_paths('fft', 'dac', graph, memo)
-        p2_seg3 = count_paths('dac', 'out', graph, memo)
-        path2_total = p2_seg1 * p2_seg2 * p2_seg3
-        
-        result_part2 = path1_total + path2_total
-        print(f"Part 2 - Total paths from 'svr' to 'out' via 'dac' and 'fft': {result_part2}")
+        # count_via handles any number of waypoints in any order.
+        result_part2 = counter.count_via('svr', 'out', ['dac', 'fft'])
+        print(f"Part 2 - Total paths from 'svr' to 'out' via 'dac' and 'fft': {result_part2}{suffix}")
         
     except FileNotFoundError:
         print(f"Error: File '{filename}' not found.")
         sys.exit(1)
+    except (GraphCycleError, ValueError, ImportError, FileExistsError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,10 @@
+import solution
+
+def test_count_via_on_one_unknown_node():
+    # Every segment is n1 -> n1, so all engines count the empty path once
+    graph = {'n0': []}
+    for counter in (solution.MemoPathCounter(graph), solution.TopoPathCounter(graph),
+                    solution.ModularPathCounter(graph, solution.CRT_PRIMES[:2], exact=True)):
+        assert counter.count('n1', 'n1') == 1
+        assert counter.count_via('n1', 'n1', ['n1']) == 1
+        assert counter.count_via('n1', 'n1', ['n1', 'n0']) == 0
@@ -0,0 +1,65 @@
+import os
+import sys
+import random
+import argparse
+
+# Writes random regions for the shapes of an existing input, for timing the
+# solver on more and larger regions than input.txt. Each region's presents
+# cover a random fraction of its area; fractions near 1 leave the regions
+# the pre-screen cannot decide to the search.
+
+def read_shapes(filename):
+    # The shape blocks of an input file, as text
+    blocks = []
+    with open(filename, 'r') as f:
+        for line in f:
+            line = line.rstrip()
+            if 'x' in line and ':' in line:
+                break
+            blocks.append(line)
+    while blocks and not blocks[-1]:
+        blocks.pop()
+    return '\n'.join(blocks) + '\n'
+
+def shape_areas(text):
+    areas = []
+    for line in text.splitlines():
+        if line.endswith(':'):
+            areas.append(0)
+        elif areas:
+            areas[-1] += line.count('#')
+    return areas
+
+def generate(shapes_text, regions, min_size, max_size, min_fill, max_fill, seed, out):
+    rng = random.Random(seed)
+    areas = shape_areas(shapes_text)
+    out.write(shapes_text + '\n')
+    for _ in range(regions):
+        w, h = rng.randint(min_size, max_size), rng.randint(min_size, max_size)
+        target = rng.uniform(min_fill, max_fill) * w * h
+        counts = [0] * len(areas)
+        covered = 0
+        while True:
+            k = rng.randrange(len(areas))
+            if covered + areas[k] > target:
+                break
+            counts[k] += 1
+            covered += areas[k]
+        out.write(f"{w}x{h}: {' '.join(map(str, counts))}\n")
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a large Day 12 input")
+    parser.add_argument('--shapes', default=os.path.join(os.path.dirname(__file__), 'input.txt'),
+                        help="input file to take the shapes from (default: input.txt)")
+    parser.add_argument('--regions', type=int, default=1000)
+    parser.add_argument('--min-size', type=int, default=6)
+    parser.add_argument('--max-size', type=int, default=50)
+    parser.add_argument('--min-fill', type=float, default=0.5)
+    parser.add_argument('--max-fill', type=float, default=1.0)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+    generate(read_shapes(args.shapes), args.regions, args.min_size, args.max_size,
+             args.min_fill, args.max_fill, args.seed, sys.stdout)
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,13 @@
 import sys
+import json
+import time
+import sqlite3
+import hashlib
+import argparse
 import collections
+from concurrent.futures import ProcessPoolExecutor
 
+# The recursive set/bitboard engines use one frame per board cell
 sys.setrecursionlimit(5000)
 
 # --- Data Structures ---
@@ -14,6 +21,11 @@ class Shape:
                 if char == '#':
                     self.coords.append((r, c))
         self.variations = self._generate_variations()
+        self._masks = {} # width -> variation masks
+        # Bounding box as (short side, long side); rotations may swap them
+        rows = max(r for r, c in self.coords) - min(r for r, c in self.coords) + 1
+        cols = max(c for r, c in self.coords) - min(c for r, c in self.coords) + 1
+        self.bbox = (min(rows, cols), max(rows, cols))
 
     def _normalize(self, coords):
         if not coords:
@@ -56,6 +68,38 @@ class Shape:
             
         return list(variations)
 
+    def orientation_reps(self, transforms):
+        # Indices of variations that are the smallest member of their orbit
+        # under the given coordinate transforms (board symmetries)
+        reps = set()
+        for i, var_coords in enumerate(self.variations):
+            orbit = [var_coords] + [self._normalize([t(r, c) for r, c in var_coords]) for t in transforms]
+            if var_coords == min(orbit):
+                reps.add(i)
+        return reps
+
+    def variation_masks(self, width):
+        # Bitboard form of each variation for a board `width` cells wide.
+        # Cell (r, c) is bit r * width + c, so an offset (dr, dc) from the
+        # anchor is bit dr * width + dc. The anchor is the first cell in reading
+        # order, so every offset is non-negative and the mask can simply be
+        # shifted left by the anchor index.
+        # Returns a list of (mask, min_dc, max_dc, max_dr) used for bounds checks.
+        if width not in self._masks:
+            entries = []
+            for var_coords in self.variations:
+                mask = 0
+                for dr, dc in var_coords:
+                    mask |= 1 << (dr * width + dc)
+                entries.append((
+                    mask,
+                    min(dc for dr, dc in var_coords),
+                    max(dc for dr, dc in var_coords),
+                    max(dr for dr, dc in var_coords),
+                ))
+            self._masks[width] = entries
+        return self._masks[width]
+
 def parse_input(filename):
     shapes = {}
     puzzles = []
@@ -108,10 +152,86 @@ def parse_input(filename):
         
     return shapes, puzzles
 
+def board_symmetries(w, h):
+    # Non-identity symmetries of a w x h board, as maps on shape offsets
+    transforms = [
+        lambda r, c: (r, -c),   # mirror left/right
+        lambda r, c: (-r, c),   # mirror top/bottom
+        lambda r, c: (-r, -c),  # rotate 180
+    ]
+    if w == h:
+        transforms += [
+            lambda r, c: (c, r),    # transpose
+            lambda r, c: (-c, -r),  # anti-transpose
+            lambda r, c: (c, -r),   # rotate 90
+            lambda r, c: (-c, r),   # rotate 270
+        ]
+    return transforms
+
+# --- Pre-screen ---
+
+FITS = 'fits'
+IMPOSSIBLE = 'impossible'
+NEEDS_SEARCH = 'needs search'
+
+def classify_region(w, h, shapes, counts):
+    # Cheap tests that decide a region without running the search.
+    # Returns (verdict, tier) where tier names the test that decided it.
+    needed = [(shapes[idx], count) for idx, count in enumerate(counts) if count > 0]
+    if not needed:
+        return FITS, 'empty'
+
+    # Tier 1: total shape area must fit in the board
+    total_shape_area = sum(len(shape.coords) * count for shape, count in needed)
+    if total_shape_area > w * h:
+        return IMPOSSIBLE, 'area'
+
+    # Tier 2: every shape must fit in the board in some orientation
+    short, long = min(w, h), max(w, h)
+    for shape, count in needed:
+        if shape.bbox[0] > short or shape.bbox[1] > long:
+            return IMPOSSIBLE, 'bounds'
+
+    # Tier 3: if the board holds one bounding box per piece on a plain grid
+    # of boxes, placing each piece in its own box is a valid packing.
+    box_a = max(shape.bbox[0] for shape, count in needed)
+    box_b = max(shape.bbox[1] for shape, count in needed)
+    total_pieces = sum(count for shape, count in needed)
+    boxes = max((w // box_a) * (h // box_b), (w // box_b) * (h // box_a))
+    if boxes >= total_pieces:
+        return FITS, 'boxes'
+
+    return NEEDS_SEARCH, 'search'
+
 # --- Solver ---
 
+# Budget checks consult the clock only every this many nodes
+DEADLINE_CHECK_INTERVAL = 1024
+
+class SearchBudgetExceeded(Exception):
+    pass
+
 class Solver:
-    def __init__(self, w, h, shapes, counts):
+    # solve() returns True (solved), False (impossible) or None (unknown:
+    # max_nodes or time_limit ran out before the search finished).
+    #
+    # Symmetry breaking: any packing can be mirrored/rotated with the board,
+    # so one shape type (sym_type) is chosen and at least one of its copies
+    # is required to use an orientation from sym_reps, one representative
+    # per orbit under the board symmetries. It is enforced on the last copy
+    # placed; with a count of 1 that fixes the piece's orientation outright.
+    # Identical copies need no extra ordering here: anchors strictly increase
+    # along the scan, so each set of placements is reached exactly once.
+    #
+    # Dead-region pruning: every piece lies at or after its anchor in reading
+    # order, so free cells behind the scan position can never be filled, and
+    # neither can a pocket of free cells (connected, after the scan position)
+    # smaller than the smallest remaining piece. Such cells are counted in
+    # `wasted` and excluded from the area bound. Pockets are looked for only
+    # next to the piece just placed, with a flood fill that stops as soon as
+    # it reaches the smallest piece area, so the check is cheap per node.
+    def __init__(self, w, h, shapes, counts, max_nodes=None, time_limit=None, symmetry=True,
+                 prune_dead=True):
         self.W = w
         self.H = h
         self.shapes = shapes
@@ -126,6 +246,118 @@ class Solver:
         self.grid = set() # Set of (r, c) occupied
         self.solution_found = False
 
+        self.max_nodes = max_nodes
+        self.time_limit = time_limit
+        self.nodes = 0
+        self.timed_out = False
+        self._deadline = None
+        self._next_check = float('inf') # node count at which to check budget
+
+        self.sym_type, self.sym_reps = self._pick_symmetry_type() if symmetry else (None, set())
+        self.sym_used = 0 # placed copies of sym_type in a representative orientation
+
+        self.prune_dead = prune_dead
+        self.dead = set() # free cells in pockets too small for any remaining piece
+        self.wasted = 0 # free cells that can no longer be covered (skipped or dead)
+
+    def _pick_symmetry_type(self):
+        # Prefer the type with the fewest copies (the restriction lands on
+        # its last copy), then the one whose orientations collapse the most
+        transforms = board_symmetries(self.W, self.H)
+        best = None
+        for type_id, count in self.target_counts.items():
+            shape = self.shapes[type_id]
+            reps = shape.orientation_reps(transforms)
+            if len(reps) == len(shape.variations):
+                continue
+            rank = (count, len(reps))
+            if best is None or rank < best[0]:
+                best = (rank, type_id, reps)
+        if best is None:
+            return None, set()
+        return best[1], best[2]
+
+    def _min_remaining_area(self):
+        return min(len(self.shapes[t].coords) for t in self.target_counts)
+
+    def _mark_dead_pockets(self, cells, frontier):
+        # Flood fill from free neighbours of `cells`, over free cells at index
+        # >= frontier. Pockets smaller than the smallest remaining piece are
+        # added to self.dead; returns the newly dead cells.
+        min_area = self._min_remaining_area()
+        seen = set()
+        newly_dead = []
+        for r, c in cells:
+            for start in ((r - 1, c), (r + 1, c), (r, c - 1), (r, c + 1)):
+                sr, sc = start
+                if not (0 <= sr < self.H and 0 <= sc < self.W) or sr * self.W + sc < frontier:
+                    continue
+                if start in self.grid or start in self.dead or start in seen:
+                    continue
+                pocket = [start]
+                seen.add(start)
+                queue = [start]
+                large = False
+                while queue and not large:
+                    pr, pc = queue.pop()
+                    for nr, nc in ((pr - 1, pc), (pr + 1, pc), (pr, pc - 1), (pr, pc + 1)):
+                        if not (0 <= nr < self.H and 0 <= nc < self.W) or nr * self.W + nc < frontier:
+                            continue
+                        cell = (nr, nc)
+                        if cell in self.grid or cell in self.dead:
+                            continue
+                        if cell in seen:
+                            # Reached an earlier component that was already big enough
+                            if cell not in pocket:
+                                large = True
+                                break
+                            continue
+                        seen.add(cell)
+                        pocket.append(cell)
+                        queue.append(cell)
+                        if len(pocket) >= min_area:
+                            large = True
+                            break
+                if not large:
+                    self.dead.update(pocket)
+                    newly_dead.extend(pocket)
+        self.wasted += len(newly_dead)
+        return newly_dead
+
+    def _symmetry_restricted(self, type_id):
+        # True when this placement is the last chance to use a representative
+        return type_id == self.sym_type and self.sym_used == 0 and self.target_counts[type_id] == 1
+
+    # Used only by instrumented solvers (see InstrumentedSearch), so the
+    # plain search never pays for them
+    def _free_cells(self):
+        return self.W * self.H - len(self.grid) - self.wasted
+
+    def _is_blocked(self, idx):
+        cell = divmod(idx, self.W)
+        return cell in self.grid or cell in self.dead
+
+    def _fit_outcome(self, idx, type_id, var_index):
+        # 'bounds' or 'overlap' if the variation cannot go at idx, else None
+        r, c = divmod(idx, self.W)
+        cells = [(r + dr, c + dc) for dr, dc in self.shapes[type_id].variations[var_index]]
+        if not all(0 <= nr < self.H and 0 <= nc < self.W for nr, nc in cells):
+            return 'bounds'
+        if any(cell in self.grid for cell in cells):
+            return 'overlap'
+        return None
+
+    def _check_budget(self):
+        if self.max_nodes is not None and self.nodes > self.max_nodes:
+            raise SearchBudgetExceeded()
+        if self._deadline is not None and time.monotonic() > self._deadline:
+            raise SearchBudgetExceeded()
+        self._next_check = self.nodes + DEADLINE_CHECK_INTERVAL
+        if self.max_nodes is not None:
+            self._next_check = min(self._next_check, self.max_nodes + 1)
+        elif self._deadline is None:
+            self._next_check = float('inf')
+
     def solve(self):
         # Validation: check total area
         total_shape_area = 0
@@ -135,10 +367,24 @@ class Solver:
             
         if total_shape_area > self.W * self.H:
             return False # Impossible
-            
+
+        if self.time_limit is not None:
+            self._deadline = time.monotonic() + self.time_limit
+        self._check_budget()
+        try:
+            return self._search()
+        except SearchBudgetExceeded:
+            self.timed_out = True
+            return None
+
+    def _search(self):
         return self._dfs(0)
         
     def _dfs(self, idx):
+        self.nodes += 1
+        if self.nodes >= self._next_check:
+            self._check_budget()
+
         # Base case: All shapes placed
         if not self.target_counts: 
             self.solution_found = True
@@ -153,11 +399,15 @@ class Solver:
         # If already occupied, move to next
         if (r, c) in self.grid:
             return self._dfs(idx + 1)
+
+        # Dead cells were already counted as wasted
+        if (r, c) in self.dead:
+            return self._dfs(idx + 1)
             
         # Optimization: Calculate if valid solution is even possible
         # Area Pruning
         remaining_needed = sum(len(self.shapes[t].coords) * cnt for t, cnt in self.target_counts.items())
-        current_free = (self.W * self.H) - len(self.grid)
+        current_free = (self.W * self.H) - len(self.grid) - self.wasted
         
         # Option 1: Try to place shapes here (Anchored at r,c)
         # Only if we have enough space (strictly, though placement check handles geometry)
@@ -168,9 +418,12 @@ class Solver:
             
             for type_id in types:
                 shape = self.shapes[type_id]
+                restricted = self._symmetry_restricted(type_id)
                 
                 # Check variations
-                for var_coords in shape.variations:
+                for var_index, var_coords in enumerate(shape.variations):
+                    if restricted and var_index not in self.sym_reps:
+                        continue
                     # Check fit
                     can_fit = True
                     cells_to_occupy = []
@@ -191,12 +444,20 @@ class Solver:
                         self.target_counts[type_id] -= 1
                         if self.target_counts[type_id] == 0:
                             del self.target_counts[type_id]
+                        is_rep = type_id == self.sym_type and var_index in self.sym_reps
+                        self.sym_used += is_rep
+                        newly_dead = []
+                        if self.prune_dead and self.target_counts:
+                            newly_dead = self._mark_dead_pockets(cells_to_occupy, idx + 1)
                             
                         # Recurse
                         if self._dfs(idx + 1):
                             return True
                             
                         # Backtrack
+                        self.wasted -= len(newly_dead)
+                        self.dead.difference_update(newly_dead)
+                        self.sym_used -= is_rep
                         self.target_counts[type_id] = self.target_counts.get(type_id, 0) + 1
                         for cr, cc in cells_to_occupy:
                             self.grid.remove((cr, cc))
@@ -205,28 +466,890 @@ class Solver:
         # Only valid if we still have enough area AFTER skipping this cell
         # (current_free - 1 since we waste this cell)
         if (current_free - 1) >= remaining_needed:
-            if self._dfs(idx + 1):
+            self.wasted += self.prune_dead
+            found = self._dfs(idx + 1)
+            self.wasted -= self.prune_dead
+            if found:
                 return True
                 
         return False
 
-def main():
-    filename = sys.argv[1] if len(sys.argv) > 1 else 'input.txt'
+class BitboardSolver(Solver):
+    # Same search as Solver, but the grid is a single int with bit
+    # r * W + c set when (r, c) is occupied. A fit check is one AND and
+    # place/unplace is one XOR against a precomputed variation mask.
+    def __init__(self, w, h, shapes, counts, max_nodes=None, time_limit=None, symmetry=True,
+                 prune_dead=True):
+        super().__init__(w, h, shapes, counts, max_nodes, time_limit, symmetry, prune_dead)
+        self.grid = 0
+        self.dead = 0
+        self.occupied = 0
+        self.masks = {t: shapes[t].variation_masks(w) for t in self.target_counts}
+        self.areas = {t: len(shapes[t].coords) for t in self.target_counts}
+
+        # Masks for one-step flood fill; shifting by 1 wraps across rows
+        self.board = (1 << (w * h)) - 1
+        first_col = sum(1 << (r * w) for r in range(h))
+        self.not_first_col = self.board & ~first_col
+        self.not_last_col = self.board & ~(first_col << (w - 1))
+
+    def _neighbours(self, bits):
+        return (((bits << 1) & self.not_first_col) | ((bits >> 1) & self.not_last_col)
+                | (bits << self.W) | (bits >> self.W)) & self.board
+
+    def _mark_dead_pockets(self, placed, frontier):
+        # Bit-parallel version of Solver._mark_dead_pockets; returns the
+        # newly dead cells as a mask
+        min_area = min(self.areas[t] for t in self.target_counts)
+        avail = self.board & ~(self.grid | self.dead) & ~((1 << frontier) - 1)
+        seeds = self._neighbours(placed) & avail
+        newly_dead = 0
+        while seeds:
+            pocket = seeds & -seeds
+            while True:
+                grown = (pocket | self._neighbours(pocket)) & avail
+                if grown == pocket or grown.bit_count() >= min_area:
+                    break
+                pocket = grown
+            if grown == pocket and pocket.bit_count() < min_area:
+                newly_dead |= pocket
+            seeds &= ~grown
+        self.dead |= newly_dead
+        self.wasted += newly_dead.bit_count()
+        return newly_dead
+
+    def _free_cells(self):
+        return self.W * self.H - self.occupied - self.wasted
+
+    def _is_blocked(self, idx):
+        return ((self.grid | self.dead) >> idx) & 1
+
+    def _fit_outcome(self, idx, type_id, var_index):
+        r, c = divmod(idx, self.W)
+        mask, min_dc, max_dc, max_dr = self.masks[type_id][var_index]
+        if c + min_dc < 0 or c + max_dc >= self.W or r + max_dr >= self.H:
+            return 'bounds'
+        if self.grid & (mask << idx):
+            return 'overlap'
+        return None
+
+    def _dfs(self, idx):
+        self.nodes += 1
+        if self.nodes >= self._next_check:
+            self._check_budget()
+
+        # Base case: All shapes placed
+        if not self.target_counts:
+            self.solution_found = True
+            return True
+
+        # Base case: End of grid
+        if idx >= self.W * self.H:
+            return False
+
+        # If already occupied (or dead), move to next
+        if ((self.grid | self.dead) >> idx) & 1:
+            return self._dfs(idx + 1)
+
+        r, c = divmod(idx, self.W)
+
+        # Area Pruning
+        remaining_needed = sum(self.areas[t] * cnt for t, cnt in self.target_counts.items())
+        current_free = (self.W * self.H) - self.occupied - self.wasted
+
+        # Option 1: Try to place shapes here (Anchored at r,c)
+        if current_free >= remaining_needed:
+            for type_id in list(self.target_counts.keys()):
+                area = self.areas[type_id]
+                restricted = self._symmetry_restricted(type_id)
+                for var_index, (mask, min_dc, max_dc, max_dr) in enumerate(self.masks[type_id]):
+                    if restricted and var_index not in self.sym_reps:
+                        continue
+                    # Check bounds
+                    if c + min_dc < 0 or c + max_dc >= self.W or r + max_dr >= self.H:
+                        continue
+                    placed = mask << idx
+                    # Check fit
+                    if self.grid & placed:
+                        continue
+
+                    # Place
+                    self.grid ^= placed
+                    self.occupied += area
+                    self.target_counts[type_id] -= 1
+                    if self.target_counts[type_id] == 0:
+                        del self.target_counts[type_id]
+                    is_rep = type_id == self.sym_type and var_index in self.sym_reps
+                    self.sym_used += is_rep
+                    newly_dead = 0
+                    if self.prune_dead and self.target_counts:
+                        newly_dead = self._mark_dead_pockets(placed, idx + 1)
+
+                    # Recurse
+                    if self._dfs(idx + 1):
+                        return True
+
+                    # Backtrack
+                    self.wasted -= newly_dead.bit_count()
+                    self.dead ^= newly_dead
+                    self.sym_used -= is_rep
+                    self.target_counts[type_id] = self.target_counts.get(type_id, 0) + 1
+                    self.occupied -= area
+                    self.grid ^= placed
+
+        # Option 2: Leave cell empty (Skip)
+        if (current_free - 1) >= remaining_needed:
+            self.wasted += self.prune_dead
+            found = self._dfs(idx + 1)
+            self.wasted -= self.prune_dead
+            if found:
+                return True
+
+        return False
+
+class IterativeSolver(BitboardSolver):
+    # BitboardSolver's search without recursion. Each stack frame holds the
+    # scan position, the moves still to try there and the undo record of the
+    # move currently applied. Occupied and dead cells are jumped over in one
+    # step by finding the lowest zero bit of the blocked mask, so frames (and
+    # counted nodes) exist only for free cells where a decision is made.
+    SKIP = None
+
+    def _next_free(self, idx):
+        # Lowest index >= idx whose bit is clear in grid | dead
+        blocked = (self.grid | self.dead) >> idx
+        return idx + ((blocked + 1) & ~blocked).bit_length() - 1
+
+    def _moves(self, idx, current_free, remaining_needed):
+        # Everything the recursive _dfs would try at idx, in the same order
+        r, c = divmod(idx, self.W)
+        moves = []
+        if current_free >= remaining_needed:
+            for type_id in self.target_counts:
+                area = self.areas[type_id]
+                restricted = self._symmetry_restricted(type_id)
+                for var_index, (mask, min_dc, max_dc, max_dr) in enumerate(self.masks[type_id]):
+                    if restricted and var_index not in self.sym_reps:
+                        continue
+                    if c + min_dc < 0 or c + max_dc >= self.W or r + max_dr >= self.H:
+                        continue
+                    placed = mask << idx
+                    if self.grid & placed:
+                        continue
+                    is_rep = type_id == self.sym_type and var_index in self.sym_reps
+                    moves.append((type_id, placed, area, is_rep))
+        if (current_free - 1) >= remaining_needed:
+            moves.append(self.SKIP)
+        moves.reverse() # popped from the end
+        return moves
+
+    def _search(self):
+        n_cells = self.W * self.H
+        remaining_needed = sum(self.areas[t] * cnt for t, cnt in self.target_counts.items())
+        stack = [] # frames: [idx, moves, undo]
+        idx = self._next_free(0)
+
+        while True:
+            # Enter a node
+            self.nodes += 1
+            if self.nodes >= self._next_check:
+                self._check_budget()
+
+            if not self.target_counts:
+                self.solution_found = True
+                return True
+
+            if idx < n_cells:
+                current_free = n_cells - self.occupied - self.wasted
+                stack.append([idx, self._moves(idx, current_free, remaining_needed), None])
+
+            # Backtrack until some frame still has a move to try
+            while True:
+                if not stack:
+                    return False
+                frame = stack[-1]
+                undo = frame[2]
+                if undo is not None:
+                    move, newly_dead = undo
+                    if move is self.SKIP:
+                        self.wasted -= self.prune_dead
+                    else:
+                        type_id, placed, area, is_rep = move
+                        self.wasted -= newly_dead.bit_count()
+                        self.dead ^= newly_dead
+                        self.sym_used -= is_rep
+                        self.target_counts[type_id] = self.target_counts.get(type_id, 0) + 1
+                        self.occupied -= area
+                        remaining_needed += area
+                        self.grid ^= placed
+                    frame[2] = None
+                if frame[1]:
+                    break
+                stack.pop()
+
+            # Apply the next move of the top frame
+            idx, moves = frame[0], frame[1]
+            move = moves.pop()
+            newly_dead = 0
+            if move is self.SKIP:
+                self.wasted += self.prune_dead
+            else:
+                type_id, placed, area, is_rep = move
+                self.grid ^= placed
+                self.occupied += area
+                remaining_needed -= area
+                self.target_counts[type_id] -= 1
+                if self.target_counts[type_id] == 0:
+                    del self.target_counts[type_id]
+                self.sym_used += is_rep
+                if self.prune_dead and self.target_counts:
+                    newly_dead = self._mark_dead_pockets(placed, idx + 1)
+            frame[2] = (move, newly_dead)
+            idx = self._next_free(idx + 1)
+
+class DLXSolver(Solver):
+    # Exact cover with Knuth's Dancing Links. Each shape type is a primary
+    # column that must be hit `count` times; each board cell is a secondary
+    # column (hit at most once, since cells may stay empty). Rows are the
+    # placements of one variation at one anchor.
+    #
+    # Nodes live in parallel lists (L, R, U, D, C) instead of objects.
+    # Node 0 is the root, 1..T are the type headers, then one header per
+    # cell, then the row nodes. Only type headers are linked into the root,
+    # so branching always happens on the most constrained shape type.
+    #
+    # Copies of one type are interchangeable: after a row has been tried
+    # for a type it is hidden for the rest of that branch loop, so each
+    # set of placements is visited once rather than once per ordering.
+    def _build(self):
+        types = sorted(self.target_counts)
+        n_types = len(types)
+        n_cells = self.W * self.H
+        n_headers = 1 + n_types + n_cells
+
+        L = list(range(-1, n_headers - 1))
+        R = list(range(1, n_headers + 1))
+        U = list(range(n_headers))
+        D = list(range(n_headers))
+        C = list(range(n_headers))
+        S = [0] * n_headers
+        # Root <-> type headers form the active list
+        L[0] = n_types
+        R[n_types] = 0
+        # Cell headers are never selected, so they link only to themselves
+        for h in range(n_types + 1, n_headers):
+            L[h] = R[h] = h
+
+        self.column_type = {1 + i: t for i, t in enumerate(types)}
+        self.row_area = {}
+        self.row_var = {}
+
+        def append(col, node):
+            U.append(U[col])
+            D.append(col)
+            D[U[col]] = node
+            U[col] = node
+            C.append(col)
+            S[col] += 1
+
+        for i, type_id in enumerate(types):
+            type_col = 1 + i
+            area = len(self.shapes[type_id].coords)
+            for r in range(self.H):
+                # Building runs after solve() has set the deadline, and a
+                # large board can take longer than the search itself
+                if self._deadline is not None and time.monotonic() > self._deadline:
+                    raise SearchBudgetExceeded()
+                for c in range(self.W):
+                    for var_index, var_coords in enumerate(self.shapes[type_id].variations):
+                        cells = []
+                        for dr, dc in var_coords:
+                            nr, nc = r + dr, c + dc
+                            if not (0 <= nr < self.H and 0 <= nc < self.W):
+                                break
+                            cells.append(nr * self.W + nc)
+                        else:
+                            first = len(C)
+                            self.row_area[first] = area
+                            self.row_var[first] = var_index
+                            cols = [type_col] + [1 + n_types + cell for cell in cells]
+                            for k, col in enumerate(cols):
+                                node = first + k
+                                append(col, node)
+                                L.append(node - 1 if k else first + len(cols) - 1)
+                                R.append(node + 1 if k + 1 < len(cols) else first)
+
+        self.L, self.R, self.U, self.D, self.C, self.S = L, R, U, D, C, S
+        self.remaining = {1 + i: self.target_counts[t] for i, t in enumerate(types)}
+        self.remaining_area = sum(len(self.shapes[t].coords) * cnt for t, cnt in self.target_counts.items())
+        self.free = n_cells
+
+    def _cover(self, col):
+        L, R, U, D, C, S = self.L, self.R, self.U, self.D, self.C, self.S
+        L[R[col]] = L[col]
+        R[L[col]] = R[col]
+        i = D[col]
+        while i != col:
+            j = R[i]
+            while j != i:
+                U[D[j]] = U[j]
+                D[U[j]] = D[j]
+                S[C[j]] -= 1
+                j = R[j]
+            i = D[i]
+
+    def _uncover(self, col):
+        L, R, U, D, C, S = self.L, self.R, self.U, self.D, self.C, self.S
+        i = U[col]
+        while i != col:
+            j = L[i]
+            while j != i:
+                S[C[j]] += 1
+                U[D[j]] = j
+                D[U[j]] = j
+                j = L[j]
+            i = U[i]
+        L[R[col]] = col
+        R[L[col]] = col
+
+    def _hide_row(self, row):
+        U, D, C, S, R = self.U, self.D, self.C, self.S, self.R
+        j = row
+        while True:
+            U[D[j]] = U[j]
+            D[U[j]] = D[j]
+            S[C[j]] -= 1
+            j = R[j]
+            if j == row:
+                break
+
+    def _unhide_row(self, row):
+        U, D, C, S, L = self.U, self.D, self.C, self.S, self.L
+        j = L[row]
+        while True:
+            S[C[j]] += 1
+            U[D[j]] = j
+            D[U[j]] = j
+            if j == row:
+                break
+            j = L[j]
+
+    def _search(self):
+        self._build()
+        return self._dlx()
+
+    def _dlx(self):
+        self.nodes += 1
+        if self.nodes >= self._next_check:
+            self._check_budget()
+
+        R, D, S = self.R, self.D, self.S
+        remaining = self.remaining
+
+        # All shape types covered
+        if R[0] == 0:
+            self.solution_found = True
+            return True
+
+        # Area Pruning
+        if self.free < self.remaining_area:
+            return False
+
+        # Pick the type with the fewest spare placements
+        col = 0
+        best = None
+        c = R[0]
+        while c != 0:
+            slack = S[c] - remaining[c]
+            if slack < 0:
+                return False
+            if best is None or slack < best:
+                col, best = c, slack
+            c = R[c]
+
+        type_id = self.column_type[col]
+        restricted = type_id == self.sym_type and self.sym_used == 0 and remaining[col] == 1
+        hidden = []
+        found = False
+        while S[col] >= remaining[col]:
+            row = D[col]
+            if restricted and self.row_var[row] not in self.sym_reps:
+                self._hide_row(row)
+                hidden.append(row)
+                continue
+            area = self.row_area[row]
+            is_rep = type_id == self.sym_type and self.row_var[row] in self.sym_reps
+
+            # Place: claim the row's cells, removing every overlapping row
+            j = R[row]
+            while j != row:
+                self._cover(self.C[j])
+                j = R[j]
+            remaining[col] -= 1
+            self.sym_used += is_rep
+            self.free -= area
+            self.remaining_area -= area
+            done = remaining[col] == 0
+            if done:
+                self._cover(col)
+
+            found = self._dlx()
+
+            # Backtrack
+            if done:
+                self._uncover(col)
+            self.remaining_area += area
+            self.free += area
+            self.sym_used -= is_rep
+            remaining[col] += 1
+            j = self.L[row]
+            while j != row:
+                self._uncover(self.C[j])
+                j = self.L[j]
+
+            if found:
+                break
+            # Later copies of this type may not use this row again
+            self._hide_row(row)
+            hidden.append(row)
+
+        for row in reversed(hidden):
+            self._unhide_row(row)
+        return found
+
+# --- Instrumentation ---
+
+class SearchStats:
+    # Counters for one region's search. tried/accepted are per shape type:
+    # the placements considered at each decision and the ones that fit (and
+    # are placed in turn, unless a solution turns up first). pruned counts
+    # hits by reason: 'area' (a branch cut by the area bound), 'bounds' and
+    # 'overlap' (placements off the board or over placed pieces),
+    # 'symmetry' (orientations skipped by symmetry breaking), 'dead' (placements
+    # that left a pocket no remaining piece fits) and, for DLX, 'exhausted'
+    # (a type with fewer placements left than copies to place).
+    def __init__(self):
+        self.tried = collections.Counter()
+        self.accepted = collections.Counter()
+        self.pruned = collections.Counter()
+        self.max_depth = 0 # most pieces placed at once
+
+    def as_dict(self):
+        return {'tried': {str(t): n for t, n in sorted(self.tried.items())},
+                'accepted': {str(t): n for t, n in sorted(self.accepted.items())},
+                'pruned': dict(sorted(self.pruned.items())),
+                'max_depth': self.max_depth}
+
+class InstrumentedSearch:
+    # Mixed in ahead of an engine by instrumented(). It wraps the engine's
+    # per-node hooks (_dfs, _moves, _dlx, _mark_dead_pockets) and works out
+    # what the node will try from the search state, so the engines
+    # themselves carry no counting code and cost nothing extra when this is
+    # not in use.
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = SearchStats()
+        self.total_pieces = sum(self.target_counts.values())
+
+    def solve(self):
+        # The _dfs wrapper adds a frame per board cell (and _dlx one per
+        # piece), so room for one more frame per cell keeps every region
+        # the plain engine can search within reach of the instrumented one
+        limit = sys.getrecursionlimit()
+        sys.setrecursionlimit(limit + self.W * self.H + 100)
+        try:
+            result = super().solve()
+        finally:
+            sys.setrecursionlimit(limit)
+        if self.solution_found:
+            self.stats.max_depth = self.total_pieces
+        return result
+
+    def _record_depth(self, remaining_pieces):
+        depth = self.total_pieces - remaining_pieces
+        if depth > self.stats.max_depth:
+            self.stats.max_depth = depth
+
+    def _record_cell(self, idx, current_free, remaining_needed):
+        # A decision at free cell idx of the cell-scan engines
+        stats = self.stats
+        if current_free < remaining_needed:
+            stats.pruned['area'] += 1
+        else:
+            for type_id in self.target_counts:
+                restricted = self._symmetry_restricted(type_id)
+                for var_index in range(len(self.shapes[type_id].variations)):
+                    stats.tried[type_id] += 1
+                    if restricted and var_index not in self.sym_reps:
+                        outcome = 'symmetry'
+                    else:
+                        outcome = self._fit_outcome(idx, type_id, var_index)
+                    if outcome is None:
+                        stats.accepted[type_id] += 1
+                    else:
+                        stats.pruned[outcome] += 1
+        if current_free - 1 < remaining_needed:
+            stats.pruned['area'] += 1 # the skip branch
+
+    def _remaining_area(self):
+        return sum(len(self.shapes[t].coords) * cnt for t, cnt in self.target_counts.items())
+
+    def _dfs(self, idx):
+        self._record_depth(sum(self.target_counts.values()))
+        if self.target_counts and idx < self.W * self.H and not self._is_blocked(idx):
+            self._record_cell(idx, self._free_cells(), self._remaining_area())
+        return super()._dfs(idx)
+
+    def _moves(self, idx, current_free, remaining_needed):
+        self._record_depth(sum(self.target_counts.values()))
+        self._record_cell(idx, current_free, remaining_needed)
+        return super()._moves(idx, current_free, remaining_needed)
+
+    def _mark_dead_pockets(self, placed, frontier):
+        newly_dead = super()._mark_dead_pockets(placed, frontier)
+        if newly_dead:
+            self.stats.pruned['dead'] += 1
+        return newly_dead
+
+    def _dlx(self):
+        # Mirrors the checks at the top of DLXSolver._dlx; the branch loop
+        # tries rows of the chosen column until fewer rows than copies remain
+        stats = self.stats
+        R, D, S = self.R, self.D, self.S
+        remaining = self.remaining
+        self._record_depth(sum(remaining.values()))
+        if R[0] != 0:
+            if self.free < self.remaining_area:
+                stats.pruned['area'] += 1
+            else:
+                col, best = 0, None
+                c = R[0]
+                while c != 0:
+                    slack = S[c] - remaining[c]
+                    if slack < 0:
+                        stats.pruned['exhausted'] += 1
+                        break
+                    if best is None or slack < best:
+                        col, best = c, slack
+                    c = R[c]
+                else:
+                    type_id = self.column_type[col]
+                    restricted = type_id == self.sym_type and self.sym_used == 0 and remaining[col] == 1
+                    row = D[col]
+                    for _ in range(best + 1):
+                        stats.tried[type_id] += 1
+                        if restricted and self.row_var[row] not in self.sym_reps:
+                            stats.pruned['symmetry'] += 1
+                        else:
+                            stats.accepted[type_id] += 1
+                        row = D[row]
+        return super()._dlx()
+
+_instrumented_classes = {}
+
+def instrumented(solver_cls):
+    # solver_cls with InstrumentedSearch mixed in; the solver's `stats`
+    # holds the counters after solve()
+    if solver_cls not in _instrumented_classes:
+        _instrumented_classes[solver_cls] = type('Instrumented' + solver_cls.__name__,
+                                                 (InstrumentedSearch, solver_cls), {})
+    return _instrumented_classes[solver_cls]
+
+ENGINES = {
+    'set': Solver,
+    'bitboard': BitboardSolver,
+    'iterative': IterativeSolver,
+    'dlx': DLXSolver,
+}
+
+# --- Result Cache ---
+
+class RegionCache:
+    # Memoizes search results per canonical region. Variations cover all 8
+    # symmetries, so WxH and HxW are the same problem and the key uses
+    # sorted dimensions. Only definite results (True/False) are stored.
+    # With a path, results also go to an sqlite file that keeps at most
+    # max_entries rows, evicting the least recently used. Lookups only
+    # note the time; the last_used updates are written in batches.
+    TOUCH_BATCH = 256
+
+    def __init__(self, shapes, path=None, max_entries=100000):
+        self.shapes_digest = shapes_digest(shapes)
+        self.memory = {}
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.path = path
+        self.db = None
+        self.touched = {} # key -> last used time, not yet written
+        self.inserts = 0
+        if path is not None:
+            self.db = sqlite3.connect(path, timeout=30)
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS results "
+                "(key TEXT PRIMARY KEY, solved INTEGER NOT NULL, last_used REAL NOT NULL)")
+            self.db.execute("CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used)")
+            self.db.commit()
+            # Rows in the file as far as this process knows; other processes
+            # may add more, so evict() counts again before deleting
+            self.rows = self.db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def key(self, w, h, counts):
+        # Trailing zero counts do not change the problem
+        counts = list(counts)
+        while counts and counts[-1] == 0:
+            counts.pop()
+        dims = f"{min(w, h)}x{max(w, h)}"
+        return f"{dims}:{' '.join(map(str, counts))}:{self.shapes_digest}"
+
+    def get(self, w, h, counts):
+        key = self.key(w, h, counts)
+        result = self.memory.get(key)
+        if result is None and self.db is not None:
+            row = self.db.execute("SELECT solved FROM results WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                result = bool(row[0])
+                self.memory[key] = result
+                self.touched[key] = time.time()
+                if len(self.touched) >= self.TOUCH_BATCH:
+                    self.write_touched()
+                    self.db.commit()
+        if result is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return result
+
+    def put(self, w, h, counts, result):
+        if result is None:
+            return
+        key = self.key(w, h, counts)
+        self.memory[key] = result
+        if self.db is not None:
+            now = time.time()
+            self.touched.pop(key, None)
+            inserted = self.db.execute("INSERT OR IGNORE INTO results VALUES (?, ?, ?)",
+                                       (key, int(result), now)).rowcount
+            if inserted:
+                self.rows += 1
+                self.inserts += 1
+            else:
+                self.db.execute("UPDATE results SET solved = ?, last_used = ? WHERE key = ?",
+                                (int(result), now, key))
+            self.write_touched()
+            # Every TOUCH_BATCH inserts the real count is checked too, in
+            # case other processes sharing the file have filled it
+            if self.rows > self.max_entries or (inserted and self.inserts % self.TOUCH_BATCH == 0):
+                self.evict()
+            self.db.commit()
+
+    def write_touched(self):
+        if self.touched:
+            self.db.executemany("UPDATE results SET last_used = ? WHERE key = ?",
+                                [(used, key) for key, used in self.touched.items()])
+            self.touched.clear()
+
+    def evict(self):
+        # Deletes the least recently used rows past max_entries, by index
+        self.rows = self.db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        excess = self.rows - self.max_entries
+        if excess > 0:
+            self.db.execute(
+                "DELETE FROM results WHERE key IN "
+                "(SELECT key FROM results ORDER BY last_used LIMIT ?)", (excess,))
+            self.rows = self.max_entries
+
+    def close(self):
+        if self.db is not None:
+            self.write_touched()
+            self.db.commit()
+            self.db.close()
+            self.db = None
+
+def shapes_digest(shapes):
+    # Stable across runs: variations are compared as sorted coordinate lists
+    canonical = sorted((sid, sorted(shape.variations)) for sid, shape in shapes.items())
+    return hashlib.sha1(repr(canonical).encode()).hexdigest()[:16]
+
+def solve_region(puzzle, shapes, solver_cls, prescreen=True, options=None, cache=None,
+                 instrument=False):
+    # Returns (result, tier, nodes) for one region. result is True/False, or
+    # None when the search ran out of budget. options holds Solver keyword
+    # arguments (max_nodes, time_limit, symmetry, prune_dead). With
+    # instrument, a fourth item is a dict of the region's search stats.
+    if instrument:
+        start = time.perf_counter()
+        solver_cls = instrumented(solver_cls)
+    w, h, counts = puzzle['w'], puzzle['h'], puzzle['counts']
+    solver = None
+    if prescreen:
+        verdict, tier = classify_region(w, h, shapes, counts)
+    else:
+        verdict, tier = NEEDS_SEARCH, 'search'
+
+    if verdict != NEEDS_SEARCH:
+        result = verdict == FITS
+    else:
+        result = None if cache is None else cache.get(w, h, counts)
+        if result is not None:
+            tier = 'cache'
+        else:
+            solver = solver_cls(w, h, shapes, counts, **(options or {}))
+            result = solver.solve()
+            if cache is not None:
+                cache.put(w, h, counts, result)
+
+    nodes = 0 if solver is None else solver.nodes
+    if not instrument:
+        return result, tier, nodes
+    record = {'w': w, 'h': h, 'counts': counts, 'result': result, 'tier': tier,
+              'nodes': nodes, 'seconds': round(time.perf_counter() - start, 6)}
+    record.update((solver.stats if solver is not None else SearchStats()).as_dict())
+    return result, tier, nodes, record
+
+# --- Parallel ---
+
+# Per-worker state, set once by _init_worker so shapes (and their cached
+# variation masks) are not pickled again for every task.
+_worker_state = {}
+
+def _init_worker(shapes, engine, prescreen, options, cache_args, instrument):
+    _worker_state['shapes'] = shapes
+    _worker_state['solver_cls'] = ENGINES[engine]
+    _worker_state['prescreen'] = prescreen
+    _worker_state['options'] = options
+    _worker_state['instrument'] = instrument
+    # Each worker keeps its own in-memory cache; the sqlite file is shared
+    _worker_state['cache'] = None if cache_args is None else RegionCache(shapes, *cache_args)
+
+def _solve_in_worker(puzzle):
+    return solve_region(puzzle, _worker_state['shapes'], _worker_state['solver_cls'],
+                        _worker_state['prescreen'], _worker_state['options'],
+                        _worker_state['cache'], _worker_state['instrument'])
+
+def solve_all(puzzles, shapes, engine, prescreen=True, jobs=1, options=None, cache=None,
+              instrument=False):
+    # Yields solve_region's tuple per puzzle, in input order
+    if jobs <= 1:
+        solver_cls = ENGINES[engine]
+        for puzzle in puzzles:
+            yield solve_region(puzzle, shapes, solver_cls, prescreen, options, cache, instrument)
+        return
+
+    cache_args = None if cache is None else (cache.path, cache.max_entries)
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                             initargs=(shapes, engine, prescreen, options, cache_args,
+                                       instrument)) as pool:
+        # Small chunks keep one slow region from holding up a large batch
+        yield from pool.map(_solve_in_worker, puzzles, chunksize=4)
+
+def scale_budget(options, factor):
+    # Scales max_nodes and time_limit, keeping each limit's type
+    scaled = dict(options)
+    for key in ('max_nodes', 'time_limit'):
+        if scaled.get(key) is not None:
+            scaled[key] = type(scaled[key])(scaled[key] * factor)
+    return scaled
+
+def run(filename, engine='iterative', prescreen=True, jobs=1, options=None, use_cache=True):
+    # (result, tier, nodes) for every region of an input file, in order
     shapes, puzzles = parse_input(filename)
+    cache = RegionCache(shapes) if use_cache else None
+    return list(solve_all(puzzles, shapes, engine, prescreen, jobs, options, cache))
+
+def write_stats(path, engine, records):
+    # One JSON object per region, in input order
+    out = sys.stdout if path == '-' else open(path, 'w')
+    try:
+        for i, record in enumerate(records):
+            out.write(json.dumps({'region': i, 'engine': engine, **record}) + '\n')
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Day 12: Christmas Tree Farm")
+    parser.add_argument('filename', nargs='?', default='input.txt')
+    parser.add_argument('--engine', choices=sorted(ENGINES), default='iterative',
+                        help="placement engine (default: iterative)")
+    parser.add_argument('--no-prescreen', action='store_true',
+                        help="send every region to the search engine")
+    parser.add_argument('--jobs', type=int, default=1,
+                        help="number of worker processes (default: 1)")
+    parser.add_argument('--max-nodes', type=int, default=None,
+                        help="give up on a region after this many search nodes")
+    parser.add_argument('--time-limit', type=float, default=None,
+                        help="give up on a region after this many seconds")
+    parser.add_argument('--retries', type=int, default=0,
+                        help="re-run unknown regions this many times with a larger budget")
+    parser.add_argument('--retry-factor', type=float, default=10,
+                        help="budget multiplier applied on each retry (default: 10)")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="do not memoize repeated regions")
+    parser.add_argument('--cache-file', default=None,
+                        help="sqlite file that keeps search results across runs")
+    parser.add_argument('--cache-size', type=int, default=100000,
+                        help="maximum entries kept in the cache file (default: 100000)")
+    parser.add_argument('--no-symmetry', action='store_true',
+                        help="disable board symmetry breaking in the search")
+    parser.add_argument('--no-dead-prune', action='store_true',
+                        help="disable dead-region pruning in the cell-scan engines")
+    parser.add_argument('--stats-file', metavar='PATH',
+                        help="write per-region search stats as JSON lines ('-' for stdout)")
+    args = parser.parse_args()
+    instrument = args.stats_file is not None
+
+    shapes, puzzles = parse_input(args.filename)
+    prescreen = not args.no_prescreen
+    options = {'max_nodes': args.max_nodes, 'time_limit': args.time_limit,
+               'symmetry': not args.no_symmetry, 'prune_dead': not args.no_dead_prune}
+    cache = None
+    if not args.no_cache:
+        cache = RegionCache(shapes, args.cache_file, args.cache_size)
     
     print(f"Loaded {len(shapes)} shapes and {len(puzzles)} puzzles.")
     # for sid, s in shapes.items():
     #     print(f"Shape {sid}: {len(s.variations)} variations")
-        
+
+    results = list(solve_all(puzzles, shapes, args.engine, prescreen, args.jobs, options, cache,
+                             instrument))
+
+    for attempt in range(args.retries):
+        unknown = [i for i, (result, *_) in enumerate(results) if result is None]
+        if not unknown:
+            break
+        options = scale_budget(options, args.retry_factor)
+        print(f"Retrying {len(unknown)} unknown regions with "
+              f"max_nodes={options['max_nodes']} time_limit={options['time_limit']}")
+        retried = solve_all([puzzles[i] for i in unknown], shapes, args.engine,
+                            prescreen, args.jobs, options, cache, instrument)
+        for i, outcome in zip(unknown, retried):
+            results[i] = outcome
+
     solved_count = 0
-    for i, puzzle in enumerate(puzzles):
-        solver = Solver(puzzle['w'], puzzle['h'], shapes, puzzle['counts'])
-        if solver.solve():
+    unknown = []
+    tier_counts = collections.Counter()
+    total_nodes = 0
+    for i, (result, tier, nodes, *_) in enumerate(results):
+        tier_counts[tier] += 1
+        total_nodes += nodes
+        if result is None:
+            print(f"Region {i}: Unknown")
+            unknown.append(i)
+        elif result:
             print(f"Region {i}: Solved")
             solved_count += 1
         else:
             print(f"Region {i}: Impossible")
-            
+
+    print("Decided by: " + ", ".join(f"{tier}={n}" for tier, n in sorted(tier_counts.items())))
+    print(f"Search nodes: {total_nodes}")
+    if unknown:
+        print(f"Unknown (budget exceeded): {len(unknown)} regions: " + " ".join(map(str, unknown)))
+    if cache is not None:
+        cache.close()
+    if instrument:
+        write_stats(args.stats_file, args.engine, [outcome[3] for outcome in results])
     print(solved_count)
 
 if __name__ == '__main__':
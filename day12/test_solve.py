@@ -0,0 +1,50 @@
+import os
+import random
+
+import solve
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+def make_shapes(*drawings):
+    return {i: solve.Shape(i, drawing.split('/')) for i, drawing in enumerate(drawings)}
+
+def test_instrumented_engines_search_tall_boards():
+    # One frame per cell fits the recursion limit; the instrumented
+    # wrapper's extra frame per cell used to raise RecursionError
+    shapes = make_shapes('###/#../###')
+    for name, engine in solve.ENGINES.items():
+        plain = engine(3, 1000, shapes, [333])
+        assert plain.solve() is True, name
+        solver = solve.instrumented(engine)(3, 1000, shapes, [333])
+        assert solver.solve() is True, name
+        assert solver.nodes == plain.nodes, name
+        assert solver.stats.max_depth == 333, name
+
+def test_dlx_build_respects_time_limit():
+    # Building the rows for a 50x50 board takes most of a second; the
+    # deadline has to stop it before the first search node
+    shapes, _ = solve.parse_input(os.path.join(HERE, 'input.txt'))
+    solver = solve.DLXSolver(50, 50, shapes, [40] * 6, time_limit=0.01)
+    assert solver.solve() is None
+    assert solver.timed_out and solver.nodes == 0
+
+# Small pieces make tight packings, where pruning mistakes show up
+PIECES = ['##', '###', '##/#.', '##/##', '#../###', '.#./###', '##./.##', '#.#/###']
+
+def random_regions(seed, count):
+    # (shapes, w, h, counts) for small regions filled to 80-100% of their area
+    rng = random.Random(seed)
+    for _ in range(count):
+        shapes = make_shapes(*rng.sample(PIECES, rng.randint(1, 3)))
+        w, h = rng.randint(2, 5), rng.randint(3, 5)
+        counts = [0] * len(shapes)
+        target = rng.uniform(0.8, 1.0) * w * h
+        area = 0
+        while True:
+            i = rng.randrange(len(shapes))
+            piece = len(shapes[i].coords)
+            if area + piece > target:
+                break
+            counts[i] += 1
+            area += piece
+        yield shapes, w, h, counts
@@ -0,0 +1,32 @@
+import sys
+import random
+import argparse
+
+# Writes a random worksheet in the puzzle's format, for timing the solution
+# on worksheets much wider (or taller) than input.txt. Numbers in a block
+# are all left- or all right-aligned, like the real input.
+
+def generate(problems, rows, max_digits, seed, out):
+    rng = random.Random(seed)
+    lines = [[] for _ in range(rows + 1)]
+    for _ in range(problems):
+        numbers = [str(rng.randint(1, 10 ** rng.randint(1, max_digits) - 1)) for _ in range(rows)]
+        width = max(map(len, numbers))
+        left = rng.random() < 0.5
+        for r, number in enumerate(numbers):
+            lines[r].append(number.ljust(width) if left else number.rjust(width))
+        lines[rows].append(rng.choice('+*').ljust(width))
+    for line in lines:
+        out.write(' '.join(line) + '\n')
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a large Day 6 input")
+    parser.add_argument('--problems', type=int, default=100000)
+    parser.add_argument('--rows', type=int, default=4)
+    parser.add_argument('--max-digits', type=int, default=4)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+    generate(args.problems, args.rows, args.max_digits, args.seed, sys.stdout)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,37 @@
+import math
+
+# Up to about this many bits in total, math.prod's left-to-right loop beats
+# the product tree; past it, the tree keeps operands balanced so the big
+# multiplications run on numbers of similar size.
+PRODUCT_TREE_BITS = 8192
+
+def product_tree(numbers):
+    # Multiplies neighbours pairwise until one number is left
+    numbers = list(numbers)
+    if not numbers:
+        return 1
+    while len(numbers) > 1:
+        pairs = iter(numbers)
+        odd = [numbers[-1]] if len(numbers) % 2 else []
+        numbers = [a * b for a, b in zip(pairs, pairs)] + odd
+    return numbers[0]
+
+def product(numbers, modulus=None):
+    if modulus is not None:
+        result = 1 % modulus
+        for n in numbers:
+            result = result * (n % modulus) % modulus
+        return result
+    if len(numbers) <= 8 or sum(map(int.bit_length, numbers)) <= PRODUCT_TREE_BITS:
+        return math.prod(numbers)
+    return product_tree(numbers)
+
+def reduce_block(operator, numbers, modulus=None):
+    # Result of one worksheet problem, optionally modulo `modulus`. Unknown
+    # operators count as 0, as before.
+    if operator == '+':
+        total = sum(numbers)
+        return total if modulus is None else total % modulus
+    if operator == '*':
+        return product(numbers, modulus)
+    return 0
@@ -1,158 +1,202 @@
+import re
 import sys
+import mmap
+import argparse
+
+from reduction import reduce_block
+
+try:
+    import numpy as np
+except ImportError: # the bytearray fallback is used instead
+    np = None
+
+SPACE = ord(' ')
+# Maps space to 0 and every other byte to 1, for the fallback separator test
+OCCUPIED = bytes(0 if b == SPACE else 1 for b in range(256))
+
+def read_rows(data):
+    # Worksheet bytes -> list of rows, without line endings or trailing blank lines
+    rows = data.replace(b'\r', b'').split(b'\n')
+    while rows and not rows[-1].strip():
+        rows.pop()
+    return rows
+
+def _grid_numpy(rows, width):
+    # Separator mask (1 = all spaces) and the digit rows transposed, one
+    # column per line, via NumPy
+    grid = np.full((len(rows), width), SPACE, dtype=np.uint8)
+    for r, row in enumerate(rows):
+        grid[r, :len(row)] = np.frombuffer(row, dtype=np.uint8)
+    separator = (grid == SPACE).all(axis=0)
+    columns = np.full((width, len(rows)), ord('\n'), dtype=np.uint8)
+    columns[:, :-1] = grid[:-1].T
+    return separator.tobytes(), columns.tobytes()
+
+def _grid_bytes(rows, width):
+    # Same as _grid_numpy, without NumPy. Rows are OR-ed together as big
+    # ints of 0/1 bytes, so a zero byte is a column of spaces in every row.
+    occupied = 0
+    for row in rows:
+        occupied |= int.from_bytes(row.ljust(width).translate(OCCUPIED), 'big')
+    separator = occupied.to_bytes(width, 'big').translate(bytes([1]) + bytes(255))
+    # Each digit row is written into every len(rows)-th byte
+    columns = bytearray(b'\n') * (width * len(rows))
+    for r, row in enumerate(rows[:-1]):
+        columns[r::len(rows)] = row.ljust(width)
+    return separator, bytes(columns)
+
+def parse_worksheet(data):
+    # One pass over the worksheet into a padded 2D byte buffer. Yields
+    # (operator, row numbers, column numbers) per problem block, left to
+    # right, the column numbers read right to left for part 2.
+    rows = read_rows(data)
+    if not rows:
+        return
+    width = max(len(row) for row in rows)
+    rows = [row.ljust(width) for row in rows]
+    separator, columns = (_grid_numpy if np is not None else _grid_bytes)(rows, width)
+    yield from _parse_blocks(rows, separator, columns, width)
+
+def _parse_blocks(rows, separator, columns, width):
+    # Problems for the blocks that end at or before column `width`, one
+    # block at a time so only the block being read holds Python ints.
+    # `columns` has len(rows) bytes per column: its digits and a newline.
+    stride = len(rows)
+    number_rows, operator_row = rows[:-1], rows[-1]
+    for match in re.finditer(b'\x00+', separator[:width]):
+        start, end = match.span()
+        operator = operator_row[start:end].strip()[:1].decode()
+        row_numbers = [int(chunk) for chunk in (row[start:end] for row in number_rows) if not chunk.isspace()]
+        digits = columns[start * stride:end * stride].replace(b' ', b'').split(b'\n')
+        column_numbers = [int(d) for d in reversed(digits) if d]
+        yield operator, row_numbers, column_numbers
+
+def stream_worksheet(filename, window=1 << 16):
+    # Yields the same problems as parse_worksheet, left to right, from a
+    # memory-mapped file. Only `window` columns of every row are copied out
+    # at a time; a block cut off by the window edge is carried into the
+    # next window, which doubles if a single block does not fit. Pages
+    # already parsed are handed back to the OS where madvise is available.
+    if window < 1:
+        raise ValueError(f"window must be at least 1 column, got {window}")
+    with open(filename, 'rb') as f:
+        if not f.seek(0, 2):
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            dontneed = getattr(mmap, 'MADV_DONTNEED', None)
+            page = mmap.PAGESIZE
+
+            def release(lo, hi):
+                # Drop the whole pages in [lo, hi) from this process
+                lo, hi = lo // page * page, hi // page * page
+                if dontneed is not None and hi > lo:
+                    mm.madvise(dontneed, lo, hi - lo)
+
+            # (start, end) of every line, without line endings. Lines are
+            # scanned a window at a time so the scan is bounded too.
+            lines = []
+            start = pos = 0
+            while start < len(mm):
+                end = mm.find(b'\n', pos, pos + window)
+                if end == -1 and pos + window < len(mm):
+                    release(pos, pos + window)
+                    pos += window
+                    continue
+                if end == -1:
+                    end = len(mm)
+                lines.append((start, end - 1 if end > start and mm[end - 1] == ord('\r') else end))
+                release(pos, end)
+                start = pos = end + 1
+            while lines and lines[-1][0] == lines[-1][1]:
+                lines.pop()
+            if not lines:
+                return
+            total_width = max(end - start for start, end in lines)
+
+            col = 0
+            while col < total_width:
+                last = col + window >= total_width
+                width = min(window, total_width - col)
+                rows = [mm[min(start + col, end):min(start + col + width, end)].ljust(width)
+                        for start, end in lines]
+                separator, columns = (_grid_numpy if np is not None else _grid_bytes)(rows, width)
+                # Keep only blocks that are known to be complete
+                cut = width if last else separator.rfind(1) + 1
+                if not cut:
+                    window *= 2
+                    continue
+                # The rows still hold the cut-off block past `cut`
+                yield from _parse_blocks([row[:cut] for row in rows], separator, columns, cut)
+                for start, end in lines:
+                    release(min(start + col, end), min(start + col + cut, end))
+                col += cut
+
+def run(filename, stream=False, window=1 << 16, modulus=None, on_block=None):
+    # (part 1, part 2) grand totals for a worksheet file, or None if it holds
+    # no problems. on_block(i, operator, part1, part2) sees every block.
+    if modulus is not None and modulus < 1:
+        raise ValueError(f"modulus must be at least 1, got {modulus}")
+    if stream:
+        problems = stream_worksheet(filename, window)
+    else:
+        with open(filename, 'rb') as f:
+            problems = parse_worksheet(f.read())
+
+    grand_total = grand_total_part2 = 0
+    blocks = 0
+    for operator, row_numbers, column_numbers in problems:
+        # Part 1 reads the rows of each block, part 2 its columns right to left
+        part1 = reduce_block(operator, row_numbers, modulus)
+        part2 = reduce_block(operator, column_numbers, modulus)
+        if on_block is not None:
+            on_block(blocks, operator, part1, part2)
+        grand_total += part1
+        grand_total_part2 += part2
+        if modulus is not None:
+            grand_total %= modulus
+            grand_total_part2 %= modulus
+        blocks += 1
+    if not blocks:
+        return None
+    return grand_total, grand_total_part2
+
+def print_block(i, operator, part1, part2):
+    print(f"Block {i} ({operator}): {part1} {part2}")
+
+def positive_int(text):
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return value
 
 def solve():
-    filename = sys.argv[1] if len(sys.argv) > 1 else 'input.txt'
+    parser = argparse.ArgumentParser(description="Day 6: Trash Compactor")
+    parser.add_argument('filename', nargs='?', default='input.txt')
+    parser.add_argument('--stream', action='store_true',
+                        help="memory-map the file and parse it in column windows")
+    parser.add_argument('--window', type=positive_int, default=1 << 16, metavar='COLS',
+                        help="columns per window in --stream mode (default: 65536)")
+    parser.add_argument('--blocks', action='store_true',
+                        help="print each block's results as it is parsed")
+    parser.add_argument('--mod', type=positive_int, metavar='M',
+                        help="compute every result and total modulo M")
+    args = parser.parse_args()
+    filename = args.filename
+    if hasattr(sys, 'set_int_max_str_digits'):
+        sys.set_int_max_str_digits(0) # tall blocks hold numbers with thousands of digits
+
     try:
-        with open(filename, 'r') as f:
-            lines = f.readlines()
+        totals = run(filename, args.stream, args.window, args.mod,
+                     print_block if args.blocks else None)
     except FileNotFoundError:
         print(f"Error: File '{filename}' not found.")
         return
-
-    # Determine width of the input
-    if not lines:
+    if totals is None:
         return
-    
-    width = len(lines[0].rstrip('\n'))
-    
-    # Identify columns that are completely empty (separators)
-    # We'll check each column index from 0 to width-1
-    # A column is a separator if it's all spaces in all lines
-    
-    # Pad lines to max width to avoid index errors
-    padded_lines = [line.rstrip('\n').ljust(width) for line in lines]
-    
-    is_separator = []
-    for col in range(width):
-        col_chars = [line[col] for line in padded_lines]
-        if all(c == ' ' for c in col_chars):
-            is_separator.append(True)
-        else:
-            is_separator.append(False)
-            
-    # Group columns into problems
-    problems = []
-    current_problem_cols = []
-    
-    for col in range(width):
-        if is_separator[col]:
-            if current_problem_cols:
-                problems.append(current_problem_cols)
-                current_problem_cols = []
-        else:
-            current_problem_cols.append(col)
-            
-    if current_problem_cols:
-        problems.append(current_problem_cols)
-        
-    grand_total = 0
-    
-    for problem_cols in problems:
-        # Extract the text for this problem
-        # Each problem has numbers and an operator at the bottom
-        # We need to find the numbers and the operator
-        
-        # Let's look at the rows for this problem's columns
-        # The operator is likely in the last non-empty line for this block
-        
-        # Extract all tokens from this vertical slice
-        tokens = []
-        
-        # We can iterate through lines and extract the chunk corresponding to these columns
-        # Then parse numbers/operators from that chunk
-        
-        problem_lines = []
-        for line in padded_lines:
-            chunk = "".join([line[c] for c in problem_cols]).strip()
-            if chunk:
-                problem_lines.append(chunk)
-                
-        # The last item should be the operator
-        operator = problem_lines[-1]
-        numbers = [int(x) for x in problem_lines[:-1]]
-        
-        result = 0
-        if operator == '+':
-            result = sum(numbers)
-        elif operator == '*':
-            result = 1
-            for n in numbers:
-                result *= n
-        
-        grand_total += result
-        # print(f"Problem: {numbers} {operator} = {result}")
-
-    print(f"Part 1 Grand Total: {grand_total}")
-
-    # Part 2
-    grand_total_part2 = 0
-    
-    for problem_cols in problems:
-        # For Part 2, we read columns right-to-left
-        # Each column is a number (top to bottom)
-        
-        numbers = []
-        # Iterate columns in reverse (right to left)
-        for col in reversed(problem_cols):
-            # Extract digits from this column (excluding the last row which is operator)
-            # Note: The operator is at the bottom of the problem block.
-            # We need to find the operator row index. It seems to be the last non-empty line of the block?
-            # In Part 1 we assumed the last line of the block text was the operator.
-            # Let's be more precise. The operator is in the last line of the input (or the last line that has content for this block).
-            
-            # Let's gather the column characters
-            col_chars = [padded_lines[r][col] for r in range(len(padded_lines))]
-            
-            # The operator is at the bottom.
-            # Let's find the operator. It's the last non-space character in the block's columns?
-            # Actually, the problem says "at the bottom of the problem is the symbol".
-            # Let's assume it's the last character in the column that is not a space?
-            # No, the operator is "at the bottom of the problem". It might span multiple columns?
-            # "Problems are separated by a full column of only spaces. The left/right alignment of numbers within each problem can be ignored."
-            # "at the bottom of the problem is the symbol for the operation that needs to be performed."
-            # In the example:
-            # *   +   *   +
-            # It seems the operator is in the last line.
-            
-            # So for a given column, the last character (in the last line) might be the operator or space.
-            # But the numbers are "above" it.
-            
-            # Let's extract the digits.
-            digits = ""
-            for r in range(len(padded_lines) - 1): # Exclude last line (operator line)
-                char = padded_lines[r][col]
-                if char.isdigit():
-                    digits += char
-            
-            if digits:
-                numbers.append(int(digits))
-        
-        # Find operator
-        # It's in the last line, somewhere within problem_cols
-        operator = None
-        last_line_chars = [padded_lines[-1][c] for c in problem_cols]
-        for char in last_line_chars:
-            if char in ['+', '*']:
-                operator = char
-                break
-        
-        if not operator:
-             # Fallback if operator is not in the very last line of the file (e.g. trailing empty lines)
-             # But based on example, it is.
-             pass
-
-        result = 0
-        if operator == '+':
-            result = sum(numbers)
-        elif operator == '*':
-            result = 1
-            for n in numbers:
-                result *= n
-        
-        grand_total_part2 += result
-        # print(f"Part 2 Problem: {numbers} {operator} = {result}")
-
-    print(f"Part 2 Grand Total: {grand_total_part2}")
+
+    suffix = f" (mod {args.mod})" if args.mod is not None else ""
+    print(f"Part 1 Grand Total: {totals[0]}{suffix}")
+    print(f"Part 2 Grand Total: {totals[1]}{suffix}")
 
 
 if __name__ == '__main__':
@@ -0,0 +1,61 @@
+import os
+import tempfile
+
+import solution
+from generate_input import generate
+
+def write_worksheet(text):
+    f = tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False)
+    with f:
+        f.write(text)
+    return f.name
+
+def check_stream_matches_parse(text, windows):
+    path = write_worksheet(text)
+    try:
+        expected = list(solution.parse_worksheet(text.encode()))
+        for window in windows:
+            assert list(solution.stream_worksheet(path, window)) == expected, window
+    finally:
+        os.unlink(path)
+
+def test_stream_matches_parse_with_blank_rows():
+    # The second block's first row is blank, so a window edge inside the
+    # third block used to shift the part 1 numbers
+    check_stream_matches_parse("    12 5 7\n 3  4  6 8\n+   *  + *\n", range(1, 12))
+
+def test_stream_matches_parse_on_generated_worksheets():
+    for seed in range(5):
+        with tempfile.TemporaryFile('w+') as out:
+            generate(40, 4, 4, seed, out)
+            out.seek(0)
+            text = out.read()
+        check_stream_matches_parse(text, [1, 2, 3, 5, 7, 16, 100, 1 << 16])
+
+def test_stream_rejects_empty_window():
+    path = write_worksheet("1 2\n+ *\n")
+    try:
+        for window in (0, -1):
+            try:
+                list(solution.stream_worksheet(path, window))
+            except ValueError:
+                pass
+            else:
+                raise AssertionError(f"window {window} was accepted")
+    finally:
+        os.unlink(path)
+
+def test_modulus_matches_exact_totals():
+    path = write_worksheet("123 328  51 64\n 45 64  387 23\n  6 98  215 314\n*   +   *   +\n")
+    try:
+        exact = solution.run(path)
+        for modulus in (1, 7, 1000000007):
+            assert solution.run(path, modulus=modulus) == tuple(t % modulus for t in exact)
+        try:
+            solution.run(path, modulus=0)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("modulus 0 was accepted")
+    finally:
+        os.unlink(path)
@@ -0,0 +1,53 @@
+import sys
+import math
+import random
+import argparse
+
+# Writes a large rectilinear polygon in the puzzle's `x,y` format, one red
+# tile per vertex in order, for timing the engines on far more vertices
+# than input.txt.
+# - skyline: random-height bars on a common base line
+# - circle: a staircase approximation of a circle, like the real input
+
+def skyline(columns, seed, max_height=1000, max_width=50):
+    rng = random.Random(seed)
+    x = rng.randint(1, 10)
+    points = [(x, 0)]
+    for _ in range(columns):
+        height, width = rng.randint(1, max_height), rng.randint(1, max_width)
+        points.append((x, height))
+        x += width
+        points.append((x, height))
+    points.append((x, 0))
+    return points
+
+def circle(steps, radius=50000):
+    points = []
+    prev = None
+    for k in range(steps):
+        angle = 2 * math.pi * k / steps
+        x = int(radius + radius * math.cos(angle))
+        y = int(radius + radius * math.sin(angle))
+        if prev is not None:
+            points.append((x, prev[1]))
+        points.append((x, y))
+        prev = (x, y)
+    points.append((points[0][0], prev[1]))
+    return points
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a large Day 9 input")
+    parser.add_argument('--shape', choices=['skyline', 'circle'], default='circle')
+    parser.add_argument('--size', type=int, default=10000,
+                        help="skyline columns or circle steps (about half the vertex count)")
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+    if args.shape == 'skyline':
+        points = skyline(args.size, args.seed)
+    else:
+        points = circle(args.size)
+    for x, y in points:
+        sys.stdout.write(f"{x},{y}\n")
+
+if __name__ == '__main__':
+    main()
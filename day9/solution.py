@@ -1,11 +1,17 @@
 import sys
+import heapq
+import bisect
+import operator
+import argparse
+import itertools
+from array import array
 
-def solve():
-    if len(sys.argv) < 2:
-        print("Usage: python3 solution.py <input_file>")
-        sys.exit(1)
+try:
+    import numpy as np
+except ImportError: # only needed for --engine numpy
+    np = None
 
-    filename = sys.argv[1]
+def read_coords(filename):
     coords = []
     
     try:
@@ -23,6 +29,10 @@ def solve():
         print("Error: Invalid input format. Expected 'x,y' on each line.")
         sys.exit(1)
 
+    return coords
+
+def solve_loop(coords):
+    # Pure-Python scan over all pairs; returns (part1, part2)
     max_area_p1 = 0
     max_area_p2 = 0
     n = len(coords)
@@ -108,6 +118,455 @@ def solve():
             # If we reached here, the rectangle is valid for Part 2
             max_area_p2 = area
 
+    return max_area_p1, max_area_p2
+
+def solve_numpy(coords, band_size=1 << 14, batch_cells=1 << 22):
+    # Part 1 is the max of the pairwise area matrix. Part 2 takes candidate
+    # pairs in bands of descending area (top band_size areas below the
+    # previous band, found chunk by chunk so the n x n matrix is never held
+    # in full) and validates each band with vectorized InsideIndex lookups,
+    # O(1) per candidate; the first valid rectangle is the answer.
+    # batch_cells caps the size of each intermediate matrix.
+    if np is None:
+        print("Error: --engine numpy requires NumPy.")
+        sys.exit(1)
+
+    n = len(coords)
+    if n < 2:
+        return 0, 0
+    batch = max(1, batch_cells // n)
+    pts = np.array(coords, dtype=np.int64)
+    xs, ys = pts[:, 0], pts[:, 1]
+    index = InsideIndex(coords)
+    # Side lengths are computed in int32 when they fit, halving the memory
+    # traffic of the pair pass; areas are always int64
+    span = max(int(xs.max() - xs.min()), int(ys.max() - ys.min()))
+    side_type = np.int32 if span < (1 << 31) - 1 else np.int64
+    side_xs, side_ys = xs.astype(side_type), ys.astype(side_type)
+
+    def pair_areas(start, stop):
+        # Areas of pairs (i, j) with start <= i < stop and j >= start, as a
+        # (stop - start) x (n - start) matrix; pairs with j <= i are -1
+        dx = side_xs[None, start:] - side_xs[start:stop, None]
+        np.abs(dx, out=dx)
+        dx += 1
+        dy = side_ys[None, start:] - side_ys[start:stop, None]
+        np.abs(dy, out=dy)
+        dy += 1
+        areas = np.multiply(dx, dy, dtype=np.int64)
+        rows = stop - start
+        areas[:, :rows][np.tril_indices(rows)] = -1
+        return areas
+
+    def next_band(below, size):
+        # Pairs with the `size` largest areas strictly below `below` (ties
+        # at the cut-off are all kept), sorted by area descending. Each
+        # chunk is cut down with a partition; only the band is sorted.
+        best_areas = np.empty(0, dtype=np.int64)
+        best_i = np.empty(0, dtype=np.int64)
+        best_j = np.empty(0, dtype=np.int64)
+        floor = 0
+        for start in range(0, n, batch):
+            stop = min(start + batch, n)
+            areas = pair_areas(start, stop)
+            keep = areas >= floor
+            if below is not None:
+                keep &= areas < below
+            ii, jj = np.nonzero(keep)
+            if len(ii) == 0:
+                continue
+            best_areas = np.concatenate([best_areas, areas[ii, jj]])
+            best_i = np.concatenate([best_i, ii + start])
+            best_j = np.concatenate([best_j, jj + start])
+            if len(best_areas) > size:
+                floor = np.partition(best_areas, len(best_areas) - size)[len(best_areas) - size]
+                keep = best_areas >= floor
+                best_areas, best_i, best_j = best_areas[keep], best_i[keep], best_j[keep]
+        order = np.argsort(-best_areas, kind='stable')
+        return best_areas[order], best_i[order], best_j[order]
+
+    def first_valid(i, j):
+        # Index of the first rectangle (i[k], j[k]) inside the polygon, or -1
+        valid = np.flatnonzero(index.contains_rects(xs[i], ys[i], xs[j], ys[j]))
+        return valid[0] if len(valid) else -1
+
+    max_area_p1 = 0
+    max_area_p2 = 0
+    below = None
+    while True:
+        areas, band_i, band_j = next_band(below, band_size)
+        if len(areas) == 0:
+            break
+        if below is None:
+            max_area_p1 = int(areas[0])
+        for start in range(0, len(areas), batch):
+            k = first_valid(band_i[start:start + batch], band_j[start:start + batch])
+            if k >= 0:
+                max_area_p2 = int(areas[start + k])
+                return max_area_p1, max_area_p2
+        below = areas[-1]
+        band_size *= 2 # each rescan of the pairs covers twice as many
+
+    return max_area_p1, max_area_p2
+
+class InsideIndex:
+    # Coordinate-compressed inside/outside raster of the polygon.
+    # The distinct x and y values of the vertices cut the plane into
+    # elementary cells; no edge crosses a cell's interior, so each cell is
+    # wholly inside or outside (decided by the even-odd rule, like the ray
+    # cast). A 2D prefix sum over the cells then answers "is this rectangle
+    # inside the polygon" in O(1). Both tables are flat and row-major:
+    # `inside` has one 0/1 byte per cell, `prefix` (rows + 1) x (cols + 1)
+    # counts. They are built with NumPy when it is installed.
+    def __init__(self, coords):
+        self.xs = sorted(set(x for x, y in coords))
+        self.ys = sorted(set(y for x, y in coords))
+        self.x_index = {x: i for i, x in enumerate(self.xs)}
+        self.y_index = {y: j for j, y in enumerate(self.ys)}
+        self.cols = len(self.xs) - 1
+        self.rows = len(self.ys) - 1
+
+        # Vertical edges as (col, first row, end row): each one toggles
+        # inside/outside for the cells right of it along its rows
+        edges = []
+        n = len(coords)
+        for k in range(n):
+            (ex1, ey1), (ex2, ey2) = coords[k], coords[(k + 1) % n]
+            if ex1 == ex2 and ey1 != ey2:
+                edges.append((self.x_index[ex1], self.y_index[min(ey1, ey2)],
+                              self.y_index[max(ey1, ey2)]))
+        if np is not None:
+            self._build_numpy(edges)
+        else:
+            self._build_arrays(edges)
+
+    def _build_numpy(self, edges):
+        rows, cols = self.rows, self.cols
+        # XOR-accumulating the toggles down each column, then along each
+        # row, leaves the even-odd parity of every cell
+        parity = np.zeros((rows + 1, cols + 1), dtype=np.uint8)
+        if edges:
+            col, lo, hi = np.array(edges, dtype=np.int64).T
+            np.bitwise_xor.at(parity, (lo, col), 1)
+            np.bitwise_xor.at(parity, (hi, col), 1)
+        np.bitwise_xor.accumulate(parity, axis=0, out=parity)
+        np.bitwise_xor.accumulate(parity, axis=1, out=parity)
+        inside = np.ascontiguousarray(parity[:rows, :cols])
+        del parity
+
+        # prefix[row, col] = inside cells in rows < row, cols < col
+        dtype = np.int32 if rows * cols < 1 << 31 else np.int64
+        prefix = np.zeros((rows + 1, cols + 1), dtype=dtype)
+        np.cumsum(inside, axis=1, dtype=dtype, out=prefix[1:, 1:])
+        np.cumsum(prefix, axis=0, out=prefix)
+        # Memoryviews index to plain ints, much faster than NumPy scalars
+        self.inside = memoryview(inside.reshape(-1))
+        self.prefix = memoryview(prefix.reshape(-1))
+
+    def _build_arrays(self, edges):
+        rows, cols = self.rows, self.cols
+        toggles = [[] for _ in range(rows)]
+        for col, lo, hi in edges:
+            for row in range(lo, hi):
+                toggles[row].append(col)
+        inside = bytearray(rows * cols)
+        prefix = array('q', bytes(8 * (cols + 1)))
+        for row in range(rows):
+            base = row * cols
+            cuts = sorted(toggles[row])
+            for start, stop in zip(cuts[0::2], cuts[1::2]):
+                inside[base + start:base + stop] = b'\x01' * (stop - start)
+            above = prefix[len(prefix) - cols:]
+            prefix.append(0)
+            prefix.extend(map(operator.add, above, itertools.accumulate(inside[base:base + cols])))
+        self.inside = inside
+        self.prefix = prefix
+
+    def _line_covered(self, sides, length):
+        # A segment on a grid line is inside the closed polygon when, along
+        # its whole length, a cell on at least one side is inside. `sides`
+        # are the 0/1 cell runs along either side that lie on the board.
+        covered = 0
+        for side in sides:
+            covered |= int.from_bytes(side, 'big')
+        return covered == int.from_bytes(b'\x01' * length, 'big')
+
+    def contains_rect(self, x1, y1, x2, y2):
+        # True if the closed rectangle with opposite vertex corners
+        # (x1, y1), (x2, y2) lies inside the closed polygon
+        c1, c2 = sorted((self.x_index[x1], self.x_index[x2]))
+        r1, r2 = sorted((self.y_index[y1], self.y_index[y2]))
+        cols, inside = self.cols, self.inside
+        if c1 == c2:
+            # Cells left and right of vertical line c1, rows r1..r2
+            sides = [inside[r1 * cols + c:r2 * cols + c:cols]
+                     for c in (c1 - 1, c1) if 0 <= c < cols]
+            return self._line_covered(sides, r2 - r1)
+        if r1 == r2:
+            # Cells below and above horizontal line r1, cols c1..c2
+            sides = [inside[r * cols + c1:r * cols + c2]
+                     for r in (r1 - 1, r1) if 0 <= r < self.rows]
+            return self._line_covered(sides, c2 - c1)
+        p, w = self.prefix, cols + 1
+        cells = p[r2 * w + c2] - p[r1 * w + c2] - p[r2 * w + c1] + p[r1 * w + c1]
+        return cells == (c2 - c1) * (r2 - r1)
+
+    def contains_rects(self, x1, y1, x2, y2):
+        # contains_rect over NumPy arrays of corners, as a boolean array.
+        # Rectangles with area are four gathers from the prefix table; the
+        # few lying on a grid line go through contains_rect.
+        cx1, cx2 = np.searchsorted(self.xs, x1), np.searchsorted(self.xs, x2)
+        ry1, ry2 = np.searchsorted(self.ys, y1), np.searchsorted(self.ys, y2)
+        c1, c2 = np.minimum(cx1, cx2), np.maximum(cx1, cx2)
+        r1, r2 = np.minimum(ry1, ry2), np.maximum(ry1, ry2)
+        p = np.asarray(self.prefix).reshape(self.rows + 1, self.cols + 1)
+        cells = p[r2, c2].astype(np.int64) - p[r1, c2] - p[r2, c1] + p[r1, c1]
+        result = cells == (c2 - c1) * (r2 - r1)
+        for k in np.flatnonzero((c1 == c2) | (r1 == r2)):
+            result[k] = self.contains_rect(int(x1[k]), int(y1[k]), int(x2[k]), int(y2[k]))
+        return result
+
+def solve_grid(coords):
+    # Pair scan as in solve_loop, with part 2 validated by an O(1)
+    # InsideIndex query instead of the O(n) polygon tests
+    index = InsideIndex(coords)
+    max_area_p1 = 0
+    max_area_p2 = 0
+    n = len(coords)
+    for i in range(n):
+        x1, y1 = coords[i]
+        for j in range(i + 1, n):
+            x2, y2 = coords[j]
+            area = (abs(x1 - x2) + 1) * (abs(y1 - y2) + 1)
+            if area > max_area_p1:
+                max_area_p1 = area
+            if area > max_area_p2 and index.contains_rect(x1, y1, x2, y2):
+                max_area_p2 = area
+    return max_area_p1, max_area_p2
+
+class _IntervalTree:
+    # Static merge-sort tree over axis-aligned edges: each edge has a key
+    # (its fixed coordinate) and an interval [lo, hi] along the other axis.
+    # Edges are sorted by key and every segment-tree node keeps its edges'
+    # lows (sorted, with the running max of highs) and highs (sorted). A
+    # key range covers O(log n) nodes, each answered by bisect, so queries
+    # are O(log^2 n).
+    def __init__(self, edges):
+        edges = sorted(edges)
+        self.keys = [key for key, lo, hi in edges]
+        self.size = 1
+        while self.size < len(edges):
+            self.size *= 2
+
+        pairs = [[] for _ in range(2 * self.size)]
+        for i, (key, lo, hi) in enumerate(edges):
+            pairs[self.size + i] = [(lo, hi)]
+        for node in range(self.size - 1, 0, -1):
+            pairs[node] = sorted(pairs[2 * node] + pairs[2 * node + 1])
+
+        self.los = []
+        self.max_hi = []
+        self.his = []
+        for node_pairs in pairs:
+            self.los.append([lo for lo, hi in node_pairs])
+            running = []
+            for lo, hi in node_pairs:
+                running.append(max(running[-1], hi) if running else hi)
+            self.max_hi.append(running)
+            self.his.append(sorted(hi for lo, hi in node_pairs))
+
+    def _nodes(self, key_lo, key_hi):
+        # Nodes covering exactly the edges with key_lo < key < key_hi
+        left = bisect.bisect_right(self.keys, key_lo) + self.size
+        right = bisect.bisect_left(self.keys, key_hi) + self.size
+        while left < right:
+            if left & 1:
+                yield left
+                left += 1
+            if right & 1:
+                right -= 1
+                yield right
+            left //= 2
+            right //= 2
+
+    def any_overlap(self, key_lo, key_hi, a, b):
+        # Is there an edge with key_lo < key < key_hi and lo < b, hi > a?
+        for node in self._nodes(key_lo, key_hi):
+            m = bisect.bisect_left(self.los[node], b)
+            if m and self.max_hi[node][m - 1] > a:
+                return True
+        return False
+
+    def count_stabbed(self, key_lo, key_hi, point):
+        # Edges with key_lo < key < key_hi and lo <= point < hi
+        total = 0
+        for node in self._nodes(key_lo, key_hi):
+            total += bisect.bisect_right(self.los[node], point) - bisect.bisect_right(self.his[node], point)
+        return total
+
+class EdgeIndex:
+    # Polygon edges split by orientation into two interval trees: vertical
+    # edges keyed by x (interval in y), horizontal edges keyed by y
+    # (interval in x). Both part 2 tests become O(log^2 n) queries.
+    def __init__(self, coords):
+        vertical = []
+        horizontal = []
+        n = len(coords)
+        for k in range(n):
+            (ex1, ey1), (ex2, ey2) = coords[k], coords[(k + 1) % n]
+            if ex1 == ex2:
+                vertical.append((ex1, min(ey1, ey2), max(ey1, ey2)))
+            else:
+                horizontal.append((ey1, min(ex1, ex2), max(ex1, ex2)))
+        self.vertical = _IntervalTree(vertical)
+        self.horizontal = _IntervalTree(horizontal)
+
+    def point_inside(self, x, y):
+        # Same ray cast as solve_loop: only vertical edges with lo <= y < hi
+        # lying right of x cross it (horizontal edges never straddle y)
+        return self.vertical.count_stabbed(x, float('inf'), y) % 2 == 1
+
+    def crosses_interior(self, min_x, min_y, max_x, max_y):
+        # Does any edge pass through the open rectangle?
+        return (self.vertical.any_overlap(min_x, max_x, min_y, max_y)
+                or self.horizontal.any_overlap(min_y, max_y, min_x, max_x))
+
+def solve_edges(coords):
+    # solve_loop with both polygon tests answered by an EdgeIndex
+    index = EdgeIndex(coords)
+    max_area_p1 = 0
+    max_area_p2 = 0
+    n = len(coords)
+    for i in range(n):
+        x1, y1 = coords[i]
+        for j in range(i + 1, n):
+            x2, y2 = coords[j]
+            area = (abs(x1 - x2) + 1) * (abs(y1 - y2) + 1)
+            if area > max_area_p1:
+                max_area_p1 = area
+            if area <= max_area_p2:
+                continue
+            min_x, max_x = min(x1, x2), max(x1, x2)
+            min_y, max_y = min(y1, y2), max(y1, y2)
+            if not index.point_inside((min_x + max_x) / 2, (min_y + max_y) / 2):
+                continue
+            if index.crosses_interior(min_x, min_y, max_x, max_y):
+                continue
+            max_area_p2 = area
+    return max_area_p1, max_area_p2
+
+def pairs_by_area(coords, chunk=64):
+    # Lazily yields (area, i, j) with i < j in descending area order.
+    # The heap holds one entry per point: either its next partner, or,
+    # before the point has been looked at, an upper bound on any of its
+    # areas (reaching the far corners of the bounding box). Partners are
+    # found `chunk` at a time (heapq.nlargest, or NumPy when installed), so
+    # memory stays O(n * chunk) and points whose bound is below the stopping
+    # area are never scanned.
+    n = len(coords)
+    if n < 2:
+        return
+    min_x = min(x for x, y in coords)
+    max_x = max(x for x, y in coords)
+    min_y = min(y for x, y in coords)
+    max_y = max(y for x, y in coords)
+
+    buffers = [None] * n # partners still to yield, as (area, -j), smallest last
+    floors = [None] * n # key of the last partner taken into the buffer
+
+    # With NumPy the O(n) partner scan is vectorized; areas must fit int64
+    vectorized = np is not None and (max_x - min_x + 1) * (max_y - min_y + 1) < 2 ** 62
+    if vectorized:
+        xs = np.array([x for x, y in coords], dtype=np.int64)
+        ys = np.array([y for x, y in coords], dtype=np.int64)
+
+    def refill(i):
+        x1, y1 = coords[i]
+        floor = floors[i]
+        if vectorized:
+            js = np.arange(i + 1, n)
+            areas = (np.abs(xs[i + 1:] - x1) + 1) * (np.abs(ys[i + 1:] - y1) + 1)
+            if floor is not None:
+                keep = (areas < floor[0]) | ((areas == floor[0]) & (js > -floor[1]))
+                js, areas = js[keep], areas[keep]
+            if len(areas) > chunk:
+                # Keep every tie at the cut-off so no partner is skipped
+                cutoff = np.partition(areas, len(areas) - chunk)[len(areas) - chunk]
+                keep = areas >= cutoff
+                js, areas = js[keep], areas[keep]
+            order = np.lexsort((js, -areas)) # area descending, then j ascending
+            best = [(int(areas[k]), -int(js[k])) for k in order]
+        else:
+            partners = []
+            for j in range(i + 1, n):
+                x2, y2 = coords[j]
+                key = ((abs(x1 - x2) + 1) * (abs(y1 - y2) + 1), -j)
+                if floor is None or key < floor:
+                    partners.append(key)
+            best = heapq.nlargest(chunk, partners)
+        if best:
+            floors[i] = best[-1]
+        best.reverse()
+        buffers[i] = best
+
+    heap = []
+    for i, (x, y) in enumerate(coords):
+        bound = (max(x - min_x, max_x - x) + 1) * (max(y - min_y, max_y - y) + 1)
+        heap.append((-bound, i, None))
+    heapq.heapify(heap)
+
+    while heap:
+        neg_area, i, j = heapq.heappop(heap)
+        if j is not None:
+            yield -neg_area, i, j
+        elif buffers[i] is None:
+            refill(i)
+        if not buffers[i]:
+            refill(i)
+            if not buffers[i]:
+                continue
+        area, neg_j = buffers[i].pop()
+        heapq.heappush(heap, (-area, i, -neg_j))
+
+def solve_stream(coords):
+    # Validates corner pairs in descending area order (EdgeIndex tests) and
+    # stops at the first valid rectangle, so only candidates at least as
+    # large as the answer are ever generated
+    index = EdgeIndex(coords)
+    max_area_p1 = 0
+    for area, i, j in pairs_by_area(coords):
+        max_area_p1 = max(max_area_p1, area)
+        (x1, y1), (x2, y2) = coords[i], coords[j]
+        min_x, max_x = min(x1, x2), max(x1, x2)
+        min_y, max_y = min(y1, y2), max(y1, y2)
+        if not index.point_inside((min_x + max_x) / 2, (min_y + max_y) / 2):
+            continue
+        if index.crosses_interior(min_x, min_y, max_x, max_y):
+            continue
+        return max_area_p1, area
+    return max_area_p1, 0
+
+ENGINES = {
+    'loop': solve_loop,
+    'grid': solve_grid,
+    'edges': solve_edges,
+    'stream': solve_stream,
+    'numpy': solve_numpy,
+}
+
+def run(filename, engine='grid'):
+    # (part 1, part 2) for a file of red tile coordinates
+    return ENGINES[engine](read_coords(filename))
+
+def solve():
+    parser = argparse.ArgumentParser(description="Day 9: Movie Theater")
+    parser.add_argument('filename')
+    parser.add_argument('--engine', choices=sorted(ENGINES), default='grid',
+                        help="rectangle search engine (default: grid)")
+    args = parser.parse_args()
+
+    max_area_p1, max_area_p2 = run(args.filename, args.engine)
+
     print(f"Part 1: {max_area_p1}")
     print(f"Part 2: {max_area_p2}")
 